@@ -0,0 +1,489 @@
+"""Throughput and latency of the slash commands against synthetic data.
+
+Builds a real PokeMare with its cogs but without a gateway connection, and
+swaps MySQL for an SQLite file behind an aiomysql-shaped pool, so the
+database layer, caches and renderers run unchanged. ``--backend sqlite``
+uses the embedded SQLite backend (WAL, threaded readers) instead. A dataset of ``--users``
+trainers spread over guilds is seeded, then ``/whos_that_pokemon`` (answered
+by a synthetic message), ``/leaderboard`` and ``/profile`` are driven with
+fake interactions. Each dataset size runs in a fresh process so peak RSS is
+per size; results are written as JSON for comparing runs.
+
+    python -m benchmarks.commands --users 1000 10000 100000 1000000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import datetime
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import sqlite3
+import subprocess
+import tempfile
+import time
+from typing import Any, Awaitable, Callable
+
+from database.sqlite import translate
+
+SCHEMA = """
+CREATE TABLE guesses (
+    user_id INTEGER NOT NULL, guild_id INTEGER NOT NULL, guesses INTEGER NOT NULL,
+    PRIMARY KEY (user_id, guild_id)
+);
+CREATE INDEX guesses_guild_rank ON guesses (guild_id, guesses DESC, user_id);
+CREATE TABLE currency (user_id INTEGER PRIMARY KEY, coins INTEGER NOT NULL);
+CREATE TABLE users (
+    user_id INTEGER PRIMARY KEY, name TEXT NOT NULL, avatar TEXT,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+
+class SQLiteCursor:
+    def __init__(self, conn: sqlite3.Connection, statements: dict[str, str]) -> None:
+        self._cursor = conn.cursor()
+        self._statements = statements
+        self.rowcount = -1
+
+    def _sql(self, sql: str) -> str:
+        translated = self._statements.get(sql)
+        if translated is None:
+            translated = self._statements[sql] = translate(sql)
+        return translated
+
+    async def __aenter__(self) -> SQLiteCursor:
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self._cursor.close()
+
+    async def execute(self, sql: str, values=None) -> None:
+        self._cursor.execute(self._sql(sql), values or ())
+        self.rowcount = self._cursor.rowcount
+
+    async def executemany(self, sql: str, values) -> None:
+        self._cursor.executemany(self._sql(sql), values)
+        self.rowcount = self._cursor.rowcount
+
+    async def fetchall(self) -> list[tuple]:
+        return self._cursor.fetchall()
+
+    async def fetchone(self) -> tuple | None:
+        return self._cursor.fetchone()
+
+
+class SQLiteConnection:
+    def __init__(self, path: str) -> None:
+        self.conn = sqlite3.connect(path, isolation_level="DEFERRED")
+        self.statements: dict[str, str] = {}
+
+    def cursor(self) -> SQLiteCursor:
+        return SQLiteCursor(self.conn, self.statements)
+
+    async def commit(self) -> None:
+        self.conn.commit()
+
+    async def rollback(self) -> None:
+        self.conn.rollback()
+
+
+class SQLitePool:
+    """Stands in for ``aiomysql.Pool``; a single connection, so the pool
+    wait recorded by Database is the time spent queueing behind it."""
+
+    def __init__(self, path: str) -> None:
+        self.maxsize = 1
+        self._connection = SQLiteConnection(path)
+        self._free: asyncio.Queue[SQLiteConnection] = asyncio.Queue()
+        self._free.put_nowait(self._connection)
+
+    @property
+    def size(self) -> int:
+        return 1
+
+    @property
+    def freesize(self) -> int:
+        return self._free.qsize()
+
+    async def acquire(self) -> SQLiteConnection:
+        return await self._free.get()
+
+    def release(self, conn: SQLiteConnection) -> None:
+        self._free.put_nowait(conn)
+
+    def close(self) -> None:
+        self._connection.conn.close()
+
+    async def wait_closed(self) -> None:
+        pass
+
+
+def seed(path: str, users: int, rng: random.Random) -> int:
+    guilds = max(10, users // 200)
+    conn = sqlite3.connect(path)
+    conn.executescript("PRAGMA journal_mode = WAL;" + SCHEMA)
+    for start in range(0, users, 50_000):
+        ids = range(start + 1, min(start + 50_000, users) + 1)
+        conn.executemany(
+            "INSERT INTO currency VALUES (?, ?)",
+            ((user_id, rng.randint(0, 5000)) for user_id in ids),
+        )
+        conn.executemany(
+            "INSERT INTO users (user_id, name, avatar) VALUES (?, ?, NULL)",
+            ((user_id, f"trainer{user_id}#0001") for user_id in ids),
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO guesses VALUES (?, ?, ?)",
+            (
+                (user_id, rng.randrange(guilds) + 1, int(rng.paretovariate(1.2)))
+                for user_id in ids
+                for _ in range(rng.randint(1, 3))
+            ),
+        )
+    conn.commit()
+    conn.close()
+    return guilds
+
+
+def png(size: int, color: tuple[int, int, int, int]) -> bytes:
+    from PIL import Image, ImageDraw
+
+    image = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    ImageDraw.Draw(image).ellipse(
+        (size // 8, size // 8, size * 7 // 8, size), fill=color
+    )
+    output = io.BytesIO()
+    image.save(output, format="PNG")
+    return output.getvalue()
+
+
+class FakeAsset:
+    def __init__(self, key: str, data: bytes) -> None:
+        self.key = key
+        self.url = f"https://cdn.example/{key}.png"
+        self._data = data
+
+    def with_format(self, _: str) -> FakeAsset:
+        return self
+
+    def with_size(self, _: int) -> FakeAsset:
+        return self
+
+    async def read(self) -> bytes:
+        return self._data
+
+    def __str__(self) -> str:
+        return self.url
+
+
+class FakeGuild:
+    def __init__(self, guild_id: int) -> None:
+        self.id = guild_id
+        self.name = f"Guild {guild_id}"
+        self.icon = None
+
+
+class FakeUser:
+    def __init__(self, user_id: int, guild: FakeGuild, avatar: bytes) -> None:
+        self.id = user_id
+        self.name = f"trainer{user_id}"
+        self.bot = False
+        self.guild = guild
+        self.avatar = None
+        self.display_avatar = FakeAsset(f"avatar{user_id % 64}", avatar)
+
+    def __str__(self) -> str:
+        return f"{self.name}#0001"
+
+
+class FakeChannel:
+    def __init__(self, channel_id: int) -> None:
+        self.id = channel_id
+
+
+class FakeMessage:
+    def __init__(self, channel: FakeChannel, author: FakeUser, content: str) -> None:
+        self.channel = channel
+        self.author = author
+        self.content = content
+
+
+class FakeResponse:
+    async def defer(self, *args, **kwargs) -> None:
+        pass
+
+
+class FakeInteraction:
+    _ids = itertools.count(1)
+
+    def __init__(self, user: FakeUser) -> None:
+        self.id = next(self._ids)
+        self.author = self.user = user
+        self.guild = user.guild
+        # a channel per interaction keeps concurrent rounds apart
+        self.channel = FakeChannel(self.id)
+        self.response = FakeResponse()
+        self.edits = 0
+        self.sends = 0
+
+    async def send(self, *args, **kwargs) -> None:
+        self.sends += 1
+
+    async def edit_original_message(self, *args, **kwargs) -> None:
+        self.edits += 1
+
+
+class FakeEmoji:
+    def __init__(self, emoji_id: int) -> None:
+        self.id = emoji_id
+        self.url = f"https://cdn.example/emojis/{emoji_id}.png"
+
+    def __str__(self) -> str:
+        return f"<:e:{self.id}>"
+
+
+class Answerer:
+    """Sends the right answer as soon as a round starts listening for it."""
+
+    def __init__(self, bot) -> None:
+        self.bot = bot
+        self.games = bot.get_cog("Games")
+        self.waiting: dict[tuple[int, int], asyncio.Future] = {}
+        register = bot.answers.register
+
+        def notify(channel_id: int, user_id: int, *args, **kwargs):
+            pending = register(channel_id, user_id, *args, **kwargs)
+            waiter = self.waiting.pop((channel_id, user_id), None)
+            if waiter is not None:
+                waiter.set_result(None)
+            return pending
+
+        bot.answers.register = notify
+
+    async def answer(self, inter: FakeInteraction) -> None:
+        key = inter.channel.id, inter.user.id
+        # with every image cached the command can get this far without yielding
+        if key not in self.bot.answers.rounds:
+            waiter = self.waiting[key] = asyncio.get_running_loop().create_future()
+            await waiter
+        round_ = next(
+            r
+            for r in self.games.engine.rounds.values()
+            if r.channel_id == inter.channel.id
+        )
+        await self.bot.answers.on_message(
+            FakeMessage(inter.channel, inter.user, round_.answer)
+        )
+
+
+async def measure(
+    name: str,
+    operation: Callable[[int], Awaitable[Any]],
+    ops: int,
+    concurrency: int,
+) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    counter = itertools.count()
+
+    async def worker() -> None:
+        nonlocal errors
+        while (i := next(counter)) < ops:
+            started = time.perf_counter()
+            try:
+                await operation(i)
+            except Exception as error:
+                errors += 1
+                if errors == 1:
+                    print(f"{name}: {error!r}")
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    result = {
+        "command": name,
+        "ops": ops,
+        "errors": errors,
+        "seconds": round(elapsed, 4),
+        "ops_per_sec": round(ops / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+        "p99_ms": round(
+            latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)] * 1000, 3
+        ),
+    }
+    print(
+        f"{name:<22} {result['ops_per_sec']:9.1f} ops/s   p50 {result['p50_ms']:8.2f} ms"
+        f"   p99 {result['p99_ms']:8.2f} ms   errors {errors}"
+    )
+    return result
+
+
+async def run_dataset(
+    users: int, ops: int, concurrency: int, warmup: int, seed_value: int, backend: str
+) -> dict:
+    from core.bot import PokeMare
+    from database.access import Database
+    from database.sqlite import SQLiteDatabase
+    from core.images import DiskLRU
+
+    rng = random.Random(seed_value)
+    workdir = tempfile.mkdtemp(prefix="pokemare-bench-")
+    path = os.path.join(workdir, "pokemare.sqlite3")
+    started = time.perf_counter()
+    guilds = seed(path, users, rng)
+    seeded = time.perf_counter() - started
+
+    bot = PokeMare()
+    bot.get_emoji = FakeEmoji
+    bot._connection.user = FakeUser(0, FakeGuild(0), b"")
+    sprites = os.path.join(workdir, "sprites")
+    os.makedirs(os.path.join(sprites, "revealed_pokemons"))
+    for dex_id in range(1, 152):
+        with open(
+            os.path.join(sprites, "revealed_pokemons", f"{dex_id}.png"), "wb"
+        ) as file:
+            file.write(png(96, (rng.randrange(256), rng.randrange(256), 90, 255)))
+    bot.images.sprite_directory = sprites
+    bot.images.disk = DiskLRU(os.path.join(workdir, "renders"), 64 * 1024 * 1024)
+    avatar = png(256, (120, 160, 220, 255))
+
+    started = time.perf_counter()
+    if backend == "sqlite":
+        bot.db = await SQLiteDatabase.create(path)
+    else:
+        bot.db = Database(SQLitePool(path))
+    bot.db.listeners.append(bot.metrics.on_query)
+    bot.load_data()
+    await bot.gtp_db.setup(bot, None)
+    await bot.currency_db.setup(bot, None)
+    await bot.stats_db.setup(bot, None)
+    await bot.user_directory.setup(bot)
+    setup = time.perf_counter() - started
+
+    trainers: dict[int, FakeUser] = {}
+
+    def trainer(i: int) -> FakeUser:
+        # a skewed pick, so some trainers come back and caches see reuse
+        user_id = min(int(rng.paretovariate(0.6)), users)
+        if user_id not in trainers:
+            trainers[user_id] = FakeUser(
+                user_id, FakeGuild(rng.randrange(guilds) + 1), avatar
+            )
+        return trainers[user_id]
+
+    games = bot.get_cog("Games")
+    answerer = Answerer(bot)
+    leaderboard = bot.get_cog("Leaderboard")
+    general = bot.get_cog("General")
+
+    async def gtp(i: int) -> None:
+        inter = FakeInteraction(trainer(i))
+        answer = asyncio.create_task(answerer.answer(inter))
+        await games.gtp_command.callback(games, inter)
+        await answer
+
+    async def lb(i: int) -> None:
+        kind = "whos that pokemon global" if i % 2 else "whos that pokemon server"
+        await leaderboard.lb_cmd.callback(
+            leaderboard, FakeInteraction(trainer(i)), kind
+        )
+
+    async def profile(i: int) -> None:
+        await general.profile.callback(general, FakeInteraction(trainer(i)))
+
+    commands = [("whos_that_pokemon", gtp), ("leaderboard", lb), ("profile", profile)]
+    for _, operation in commands:
+        for i in range(warmup):
+            await operation(i)
+    results = [await measure(name, op, ops, concurrency) for name, op in commands]
+
+    await bot.user_directory.close()
+    bot.timers.stop()
+    bot.images.close()
+    await bot.db.close()
+    return {
+        "users": users,
+        "guilds": guilds,
+        "seed_seconds": round(seeded, 3),
+        "setup_seconds": round(setup, 3),
+        "peak_rss_mb": round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1
+        ),
+        "commands": results,
+    }
+
+
+def run_in_process(connection, *args) -> None:
+    # not a Pool worker: those are daemonic and the renderer needs a pool
+    connection.send(asyncio.run(run_dataset(*args)))
+    connection.close()
+
+
+def commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--users", type=int, nargs="+", default=[1_000, 10_000, 100_000]
+    )
+    parser.add_argument("--ops", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=151)
+    parser.add_argument("--backend", choices=("standin", "sqlite"), default="standin")
+    parser.add_argument("--output", default="bench_output.json")
+    arguments = parser.parse_args()
+
+    runs = []
+    context = multiprocessing.get_context("spawn")
+    for users in arguments.users:
+        print(f"--- {users} users")
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(
+            target=run_in_process,
+            args=(
+                sender,
+                users,
+                arguments.ops,
+                arguments.concurrency,
+                arguments.warmup,
+                arguments.seed,
+                arguments.backend,
+            ),
+        )
+        process.start()
+        runs.append(receiver.recv())
+        process.join()
+    report = {
+        "benchmark": "commands",
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "commit": commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "backend": arguments.backend,
+        "ops": arguments.ops,
+        "concurrency": arguments.concurrency,
+        "runs": runs,
+    }
+    with open(arguments.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    print(f"Wrote {arguments.output}")
@@ -0,0 +1,105 @@
+"""Memory per active round and timeout accuracy of the game engine.
+
+Starts ``--rounds`` concurrent text-answer rounds on a GameEngine with
+deadlines spread over ``--min-timeout``..``--max-timeout`` seconds, lets
+them all expire and reports how late each expiry fired. The same is done
+for the previous pattern, one ``asyncio.wait_for`` task per round.
+
+    python -m benchmarks.game_rounds --rounds 10000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import tracemalloc
+
+from cogs.games import GameEngine
+from core.dispatcher import AnswerDispatcher
+from core.timers import TimerWheel
+
+
+class FakeBot:
+    def __init__(self, tick: float) -> None:
+        self.timers = TimerWheel(tick=tick)
+        self.answers = AnswerDispatcher(self, self.timers)
+
+    def add_listener(self, *args) -> None:
+        pass
+
+
+def describe(label: str, memory: int, rounds: int, lateness: list[float]) -> None:
+    lateness.sort()
+    print(
+        f"{label:<22} {memory / rounds:7.0f} B/round   late p50 "
+        f"{lateness[len(lateness) // 2] * 1000:6.1f} ms  p99 "
+        f"{lateness[int(len(lateness) * 0.99)] * 1000:6.1f} ms  max "
+        f"{lateness[-1] * 1000:6.1f} ms  early {sum(x < 0 for x in lateness)}"
+    )
+
+
+async def engine_rounds(args: argparse.Namespace) -> None:
+    loop = asyncio.get_running_loop()
+    bot = FakeBot(args.tick)
+    engine = GameEngine(bot)
+    lateness: list[float] = []
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for user_id in range(args.rounds):
+        timeout = random.uniform(args.min_timeout, args.max_timeout)
+        deadline = loop.time() + timeout
+        round_ = engine.start(
+            "load", user_id % 500, user_id, "pikachu", timeout, check=lambda m: False
+        )
+        round_.future.add_done_callback(
+            lambda _, d=deadline: lateness.append(loop.time() - d)
+        )
+    memory = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    while len(lateness) < args.rounds:
+        await asyncio.sleep(0.05)
+    for round_ in list(engine.rounds.values()):
+        round_.future.exception()
+        engine.finish(round_)
+    bot.timers.stop()
+    describe("engine + timer wheel", memory, args.rounds, lateness)
+
+
+async def wait_for_rounds(args: argparse.Namespace) -> None:
+    loop = asyncio.get_running_loop()
+    lateness: list[float] = []
+
+    async def one_round(timeout: float) -> None:
+        deadline = loop.time() + timeout
+        try:
+            await asyncio.wait_for(loop.create_future(), timeout)
+        except asyncio.TimeoutError:
+            lateness.append(loop.time() - deadline)
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tasks = [
+        asyncio.create_task(
+            one_round(random.uniform(args.min_timeout, args.max_timeout))
+        )
+        for _ in range(args.rounds)
+    ]
+    await asyncio.sleep(0)
+    memory = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    await asyncio.gather(*tasks)
+    describe("wait_for per round", memory, args.rounds, lateness)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=10_000)
+    parser.add_argument("--min-timeout", type=float, default=5.0)
+    parser.add_argument("--max-timeout", type=float, default=30.0)
+    parser.add_argument("--tick", type=float, default=0.1)
+    arguments = parser.parse_args()
+    asyncio.run(engine_rounds(arguments))
+    asyncio.run(wait_for_rounds(arguments))
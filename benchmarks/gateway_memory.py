@@ -0,0 +1,229 @@
+"""Resident memory per 1,000 guilds with the default and low-memory gateway.
+
+Synthetic GUILD_CREATE and MESSAGE_CREATE payloads are fed through
+disnake's own parsers with the exact options ``PokeMare`` passes for each
+profile, so the caches fill as they would on a live connection. Guilds
+arrive with all their members, which is what chunking leaves behind in
+the default profile. A few rounds are running, and a small share of the
+chatter answers them. Each profile runs in a fresh process; memory is the
+RSS growth across the whole replay.
+
+    python -m benchmarks.gateway_memory --guilds 1000 --members 250 --messages 200
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import datetime
+import gc
+import multiprocessing
+import random
+import time
+
+from disnake.ext import commands
+from disnake.user import ClientUser
+
+from core.bot import gateway_options
+from core.dispatcher import AnswerDispatcher
+from core.timers import TimerWheel
+
+BOT_ID = 1 << 50
+JOINED = datetime.datetime(2022, 6, 1, tzinfo=datetime.timezone.utc).isoformat()
+
+
+def rss_kb() -> int:
+    with open("/proc/self/status") as file:
+        for line in file:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def user(user_id: int) -> dict:
+    return {
+        "id": str(user_id),
+        "username": f"trainer{user_id}",
+        "global_name": f"Trainer {user_id}",
+        "discriminator": "0",
+        "avatar": f"{user_id:032x}",
+    }
+
+
+def member(user_id: int) -> dict:
+    return {
+        "user": user(user_id),
+        "roles": [],
+        "joined_at": JOINED,
+        "deaf": False,
+        "mute": False,
+        "flags": 0,
+    }
+
+
+def guild(guild_id: int, channels: list[int], members: list[int]) -> dict:
+    return {
+        "id": str(guild_id),
+        "name": f"Guild {guild_id}",
+        "owner_id": str(members[0]),
+        "member_count": len(members) + 1,
+        "large": len(members) > 250,
+        "features": [],
+        "emojis": [],
+        "stickers": [],
+        "roles": [
+            {
+                "id": str(guild_id),
+                "name": "@everyone",
+                "permissions": "0",
+                "position": 0,
+                "color": 0,
+                "colors": {
+                    "primary_color": 0,
+                    "secondary_color": None,
+                    "tertiary_color": None,
+                },
+                "hoist": False,
+                "managed": False,
+                "mentionable": False,
+            }
+        ],
+        "channels": [
+            {
+                "id": str(channel_id),
+                "type": 0,
+                "name": f"channel-{channel_id}",
+                "position": position,
+                "permission_overwrites": [],
+            }
+            for position, channel_id in enumerate(channels)
+        ],
+        "members": [member(BOT_ID)] + [member(user_id) for user_id in members],
+        "threads": [],
+        "voice_states": [],
+        "presences": [],
+    }
+
+
+def message(
+    message_id: int, guild_id: int, channel_id: int, user_id: int, content: str
+) -> dict:
+    return {
+        "id": str(message_id),
+        "guild_id": str(guild_id),
+        "channel_id": str(channel_id),
+        "author": user(user_id),
+        "member": {
+            key: value for key, value in member(user_id).items() if key != "user"
+        },
+        "content": content,
+        "timestamp": JOINED,
+        "edited_timestamp": None,
+        "tts": False,
+        "mention_everyone": False,
+        "mentions": [],
+        "mention_roles": [],
+        "attachments": [],
+        "embeds": [],
+        "pinned": False,
+        "type": 0,
+    }
+
+
+async def replay(
+    low_memory: bool, guilds: int, members: int, messages: int, seed: int
+) -> dict:
+    rng = random.Random(seed)
+    bot = commands.AutoShardedBot(
+        command_prefix="p!", shard_count=1, **gateway_options(low_memory)
+    )
+    answers = AnswerDispatcher(bot, TimerWheel())
+    if low_memory:
+        answers.drop_idle_messages(("p!",))
+    state = bot._connection
+    state.user = ClientUser(state=state, data=user(BOT_ID))
+    parsers = state.parsers
+    gc.collect()
+    before = rss_kb()
+    started = time.perf_counter()
+    next_id = BOT_ID + 1
+    for guild_id in range(1, guilds + 1):
+        size = max(2, int(rng.lognormvariate(0, 1) * members / 1.65))
+        member_ids = list(range(next_id, next_id + size))
+        channel_ids = [guild_id << 8 | n for n in range(8)]
+        next_id += size
+        parsers["GUILD_CREATE"](guild(guild_id << 20, channel_ids, member_ids))
+        # one running round in every tenth guild
+        if guild_id % 10 == 0:
+            answers.register(channel_ids[0], member_ids[0], lambda _: False)
+        for n in range(messages):
+            if guild_id % 10 == 0 and n % 20 == 0:
+                channel_id, author_id = channel_ids[0], member_ids[0]
+            else:
+                channel_id, author_id = rng.choice(channel_ids), rng.choice(member_ids)
+            parsers["MESSAGE_CREATE"](
+                message(
+                    next_id + n,
+                    guild_id << 20,
+                    channel_id,
+                    author_id,
+                    "did you see the new pokemon trailer " * rng.randint(1, 4),
+                )
+            )
+        next_id += messages
+        if guild_id % 50 == 0:
+            # let the scheduled on_message handlers run
+            await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    gc.collect()
+    grown = rss_kb() - before
+    return {
+        "profile": "low memory" if low_memory else "default",
+        "guilds": guilds,
+        "seconds": round(time.perf_counter() - started, 2),
+        "rss_mb": round(grown / 1024, 1),
+        "rss_mb_per_1000_guilds": round(grown / 1024 * 1000 / guilds, 1),
+        "cached_members": sum(len(g._members) for g in bot.guilds),
+        "cached_users": len(state._users),
+        "cached_messages": len(state._messages or ()),
+        "dropped_messages": answers.dropped,
+    }
+
+
+def run_in_process(connection, *args) -> None:
+    connection.send(asyncio.run(replay(*args)))
+    connection.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--guilds", type=int, default=1000)
+    parser.add_argument("--members", type=int, default=250, help="mean guild size")
+    parser.add_argument("--messages", type=int, default=200, help="per guild")
+    parser.add_argument("--seed", type=int, default=151)
+    arguments = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    for low_memory in (False, True):
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(
+            target=run_in_process,
+            args=(
+                sender,
+                low_memory,
+                arguments.guilds,
+                arguments.members,
+                arguments.messages,
+                arguments.seed,
+            ),
+        )
+        process.start()
+        sender.close()
+        result = receiver.recv()
+        process.join()
+        print(
+            f"{result['profile']:<11} {result['rss_mb']:8.1f} MB "
+            f"({result['rss_mb_per_1000_guilds']:.1f} MB per 1,000 guilds) in "
+            f"{result['seconds']}s; cached {result['cached_members']} members, "
+            f"{result['cached_users']} users, {result['cached_messages']} messages; "
+            f"dropped {result['dropped_messages']} messages"
+        )
@@ -0,0 +1,74 @@
+"""Answer matching cost: precomputed fuzzy index versus a naive scan.
+
+The naive baseline computes a bounded edit distance against every known name
+for each message, which is what matching without an index would cost.
+
+    python -m benchmarks.name_matcher --queries 20000
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import string
+import time
+
+from core.matcher import NameMatcher, edit_distance
+from core.pokedex import Pokedex, normalize
+
+
+def typo(name: str) -> str:
+    chars = list(name)
+    position = random.randrange(len(chars))
+    action = random.choice(("swap", "drop", "replace"))
+    if action == "swap" and position + 1 < len(chars):
+        chars[position], chars[position + 1] = chars[position + 1], chars[position]
+    elif action == "drop" and len(chars) > 4:
+        del chars[position]
+    else:
+        chars[position] = random.choice(string.ascii_lowercase)
+    return "".join(chars)
+
+
+def naive_resolve(keys: list[str], answer: str, limit: int) -> list[str]:
+    answer = normalize(answer).replace(" ", "")
+    return [key for key in keys if edit_distance(answer, key, limit) <= limit]
+
+
+def timed(label: str, function, queries: list[str]) -> None:
+    start = time.perf_counter()
+    for query in queries:
+        function(query)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed / len(queries) * 1e6:9.1f} µs/query")
+
+
+def main(queries: int) -> None:
+    pokedex = Pokedex.open()
+    start = time.perf_counter()
+    matcher = NameMatcher.from_pokedex(pokedex)
+    print(
+        f"index build {(time.perf_counter() - start) * 1000:.1f} ms, "
+        f"{len(matcher.groups)} names, {len(matcher.index)} delete variants"
+    )
+    names = sorted(matcher.groups)
+    exact = [random.choice(names) for _ in range(queries)]
+    typos = [typo(name) for name in exact]
+    chatter = [
+        "".join(random.choices(string.ascii_lowercase + " ", k=random.randint(3, 20)))
+        for _ in range(queries)
+    ]
+    keys = list(matcher.groups)
+
+    for label, batch in (("exact", exact), ("typo", typos), ("chatter", chatter)):
+        timed(f"index / {label}", matcher.resolve, batch)
+        timed(
+            f"naive scan / {label}",
+            lambda q: naive_resolve(keys, q, matcher.max_distance),
+            batch[: max(queries // 100, 50)],
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=20000)
+    main(parser.parse_args().queries)
@@ -0,0 +1,70 @@
+"""Autocomplete cost for /pokedex: sorted-array prefix index versus a scan.
+
+Queries are prefixes of random names as they are typed, one character at a
+time, ranked by a skewed popularity count like the cog keeps. The baseline
+is the ``startswith`` scan the other autocomplete handlers use.
+
+    python -m benchmarks.pokedex_autocomplete --names 5000
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from collections import Counter
+
+from core.completion import PrefixIndex
+from core.pokedex import Pokedex, normalize
+
+
+def naive_complete(
+    labels: list[tuple[str, str]], text: str, popularity: Counter[str], limit: int = 25
+) -> list[str]:
+    prefix = normalize(text)
+    found = [(key, label) for key, label in labels if key.startswith(prefix)]
+    found.sort(key=lambda item: (-popularity[item[0]], item[1]))
+    return [label for _, label in found[:limit]]
+
+
+def timed(label: str, function, queries: list[str]) -> None:
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        function(query)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    print(
+        f"{label:<22} p50 {latencies[len(latencies) // 2] * 1e6:8.1f} µs   "
+        f"p99 {latencies[int(len(latencies) * 0.99)] * 1e6:8.1f} µs"
+    )
+
+
+def main(names: int) -> None:
+    pokedex = Pokedex.open()
+    start = time.perf_counter()
+    index = PrefixIndex.from_pokedex(pokedex)
+    print(
+        f"index build {(time.perf_counter() - start) * 1000:.1f} ms, "
+        f"{len(index.labels)} names, {len(index.keys)} keys"
+    )
+    popularity = Counter(
+        {normalize(label): int(random.paretovariate(1.0)) for label in index.labels}
+    )
+    queries = [
+        name[:length]
+        for name in random.choices(index.labels, k=names)
+        for length in range(len(name) + 1)
+    ]
+    timed("prefix index", lambda q: index.complete(q, popularity), queries)
+    labels = list(zip(index.normalized, index.labels))
+    timed(
+        "startswith scan",
+        lambda q: naive_complete(labels, q, popularity),
+        queries,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--names", type=int, default=2000)
+    main(parser.parse_args().names)
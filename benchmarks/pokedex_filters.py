@@ -0,0 +1,135 @@
+"""Cost of /pokedex search: bitset filter index versus scanning the JSON dicts.
+
+Random queries mix AND, comma alternatives, exclusions and ``or`` groups.
+The baseline loops over the nested ``pokemon_dict`` entries for every
+query. ``--copies`` repeats the dex to see how both grow with its size;
+every result is checked against the scan.
+
+    python -m benchmarks.pokedex_filters --queries 2000 --copies 10
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import shlex
+import time
+
+from core.filters import ALIASES, FIELDS, FilterIndex, bits_set
+from core.pokedex import POKEMONS_PATH, PokemonRecord, normalize
+
+# query field -> key in pokemons.json
+JSON_FIELDS = {
+    "type": "type",
+    "ability": "abilities",
+    "egg": "egg_groups",
+    "species": "species",
+    "gen": "generation",
+}
+
+
+def values_of(entry: dict, field: str) -> list[str]:
+    values = entry[JSON_FIELDS[field]]
+    return [
+        normalize(value) for value in (values if isinstance(values, list) else [values])
+    ]
+
+
+def parse(query: str) -> list[list[tuple[bool, list[str], set[str]]]]:
+    groups: list[list[tuple[bool, list[str], set[str]]]] = [[]]
+    for word in shlex.split(query):
+        if word.lower() in ("or", "|"):
+            groups.append([])
+            continue
+        negate = word.startswith("-")
+        field, separator, value = word.lstrip("-").rpartition(":")
+        field = ALIASES.get(normalize(field), normalize(field))
+        fields = [field] if separator else list(FIELDS)
+        groups[-1].append(
+            (negate, fields, {normalize(option) for option in value.split(",")})
+        )
+    return groups
+
+
+def naive_search(pokemon_dict: dict, query: str) -> list[int]:
+    # the query is parsed once, each entry's raw values are compared as-is
+    groups = parse(query)
+    found = []
+    for position, entry in enumerate(pokemon_dict.values()):
+        for group in groups:
+            if all(
+                any(wanted.intersection(values_of(entry, f)) for f in fields) != negate
+                for negate, fields, wanted in group
+            ):
+                found.append(position)
+                break
+    return found
+
+
+def random_query(vocabulary: dict[str, list[str]]) -> str:
+    groups = []
+    for _ in range(random.choice((1, 1, 1, 2))):
+        terms = []
+        for _ in range(random.randint(1, 3)):
+            field = random.choice(list(vocabulary))
+            values = vocabulary[field]
+            options = random.sample(values, min(random.choice((1, 1, 2)), len(values)))
+            term = f"{field}:{','.join(options)}"
+            terms.append(shlex.quote(("-" if random.random() < 0.2 else "") + term))
+        groups.append(" ".join(terms))
+    return " or ".join(groups)
+
+
+def timed(label: str, function, queries: list[str]) -> list:
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(function(query))
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    print(
+        f"{label:<16} p50 {latencies[len(latencies) // 2] * 1e6:9.1f} µs   "
+        f"p99 {latencies[int(len(latencies) * 0.99)] * 1e6:9.1f} µs"
+    )
+    return results
+
+
+def main(queries: int, copies: int) -> None:
+    with open(POKEMONS_PATH) as file:
+        raw = json.load(file)
+    # the file keys every pokemon by name and by id; keep one of each
+    pokemons = [entry for key, entry in raw.items() if key.isdigit()]
+    pokemon_dict = {
+        f"{copy}-{entry['id']}": entry for copy in range(copies) for entry in pokemons
+    }
+    start = time.perf_counter()
+    index = FilterIndex(
+        PokemonRecord.unpack(PokemonRecord.pack(entry))
+        for entry in pokemon_dict.values()
+    )
+    print(
+        f"index build {(time.perf_counter() - start) * 1000:.1f} ms, "
+        f"{index.size} pokemon, "
+        f"{sum(len(column) for column in index.columns.values())} bitsets"
+    )
+    vocabulary = {
+        field: [value.replace(" ", "-") for value in index.values(field)]
+        for field in FIELDS
+    }
+    workload = [random_query(vocabulary) for _ in range(queries)]
+    fast = timed(
+        "bitset index",
+        lambda q: list(bits_set(index.evaluate(q))),
+        workload,
+    )
+    slow = timed("dict scan", lambda q: naive_search(pokemon_dict, q), workload)
+    mismatched = sum(a != b for a, b in zip(fast, slow))
+    print(f"{mismatched} of {queries} results differ from the scan")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--copies", type=int, default=1)
+    arguments = parser.parse_args()
+    main(arguments.queries, arguments.copies)
@@ -0,0 +1,82 @@
+"""Startup time and resident memory of the raw JSON dicts versus the index.
+
+Each mode runs in a fresh interpreter so the numbers do not leak into each
+other; RSS is the growth measured around the load itself.
+
+    python -m benchmarks.pokedex_load --runs 20
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+PROBE = """
+import json, time
+
+def rss():
+    with open("/proc/self/status") as file:
+        for line in file:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+
+{imports}
+before = rss()
+start = time.perf_counter()
+{load}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "rss_kb": rss() - before}}))
+"""
+
+MODES = {
+    "json dicts": (
+        "",
+        """
+with open("data/pokemons.json") as file:
+    pokemon_dict = json.load(file)
+with open("data/wtp.json") as file:
+    wtp_dict = json.load(file)
+pokemon_dict.get("25")
+""",
+    ),
+    "index (lazy)": (
+        "from core.pokedex import Pokedex",
+        """
+pokedex = Pokedex.open(rebuild=False)
+pokedex.by_id(25)
+""",
+    ),
+    "index (all decoded)": (
+        "from core.pokedex import Pokedex",
+        """
+pokedex = Pokedex.open(rebuild=False)
+list(pokedex), list(pokedex.forms), pokedex.aliases
+""",
+    ),
+}
+
+
+def run(imports: str, load: str) -> dict:
+    output = subprocess.check_output(
+        [sys.executable, "-c", PROBE.format(imports=imports, load=load)], text=True
+    )
+    return json.loads(output.splitlines()[-1])
+
+
+def main(runs: int) -> None:
+    from core.pokedex import compile_index
+
+    compile_index()
+    for name, (imports, load) in MODES.items():
+        samples = [run(imports, load) for _ in range(runs)]
+        seconds = statistics.median(s["seconds"] for s in samples) * 1000
+        rss = statistics.median(s["rss_kb"] for s in samples)
+        print(f"{name:<20} load {seconds:7.2f} ms   rss +{rss:6.0f} KiB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    main(parser.parse_args().runs)
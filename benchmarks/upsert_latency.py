@@ -0,0 +1,129 @@
+"""Per-answer write latency: select-then-write versus a single upsert.
+
+Runs against the MySQL server configured in ``.env`` using throwaway
+``bench_*`` tables, so it is safe to point at a development database.
+
+    python -m benchmarks.upsert_latency --answers 2000 --users 200
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+
+import aiomysql
+import dotenv
+
+CREATE = (
+    "DROP TABLE IF EXISTS bench_guesses_legacy",
+    "DROP TABLE IF EXISTS bench_guesses_keyed",
+    "CREATE TABLE bench_guesses_legacy ( user_id BIGINT, guild_id BIGINT, guesses INT )",
+    """
+    CREATE TABLE bench_guesses_keyed
+    (
+        user_id BIGINT NOT NULL,
+        guild_id BIGINT NOT NULL,
+        guesses INT NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, guild_id)
+    )
+    """,
+)
+DROP = ("DROP TABLE bench_guesses_legacy", "DROP TABLE bench_guesses_keyed")
+
+
+async def execute(pool: aiomysql.Pool, sql: str, values: tuple = None, fetch=False):
+    async with pool.acquire() as conn:
+        async with conn.cursor() as cursor:
+            await cursor.execute(sql, values)
+            if fetch:
+                return await cursor.fetchall()
+        await conn.commit()
+
+
+async def legacy_answer(pool: aiomysql.Pool, user_id: int, guild_id: int) -> None:
+    values = (user_id, guild_id)
+    if await execute(
+        pool,
+        "SELECT * FROM bench_guesses_legacy WHERE user_id = %s AND guild_id = %s",
+        values,
+        fetch=True,
+    ):
+        await execute(
+            pool,
+            "UPDATE bench_guesses_legacy SET guesses = guesses + 1 WHERE user_id = %s AND guild_id = %s",
+            values,
+        )
+    else:
+        await execute(
+            pool, "INSERT INTO bench_guesses_legacy VALUES ( %s, %s, 1 )", values
+        )
+
+
+async def upsert_answer(pool: aiomysql.Pool, user_id: int, guild_id: int) -> None:
+    await execute(
+        pool,
+        """
+        INSERT INTO bench_guesses_keyed ( user_id, guild_id, guesses )
+        VALUES ( %s, %s, 1 )
+        ON DUPLICATE KEY UPDATE guesses = guesses + 1
+        """,
+        (user_id, guild_id),
+    )
+
+
+async def measure(
+    pool: aiomysql.Pool, answer, workload: list[tuple[int, int]]
+) -> list[float]:
+    timings = []
+    for user_id, guild_id in workload:
+        start = time.perf_counter()
+        await answer(pool, user_id, guild_id)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(name: str, timings: list[float]) -> None:
+    timings = sorted(timings)
+    print(
+        f"{name:<18} mean {statistics.fmean(timings):7.3f} ms"
+        f"  p50 {timings[len(timings) // 2]:7.3f} ms"
+        f"  p99 {timings[int(len(timings) * 0.99) - 1]:7.3f} ms"
+    )
+
+
+async def main(answers: int, users: int, guilds: int) -> None:
+    dotenv.load_dotenv()
+    pool = await aiomysql.create_pool(
+        host=os.getenv("MYSQLHOST"),
+        user=os.getenv("MYSQLUSER"),
+        db=os.getenv("MYSQLDATABASE"),
+        password=os.getenv("MYSQLPASSWORD"),
+        port=int(os.getenv("MYSQLPORT")),
+        autocommit=False,
+    )
+    try:
+        for statement in CREATE:
+            await execute(pool, statement)
+        workload = [
+            (random.randint(1, users), random.randint(1, guilds))
+            for _ in range(answers)
+        ]
+        report("select + write", await measure(pool, legacy_answer, workload))
+        report("upsert", await measure(pool, upsert_answer, workload))
+    finally:
+        for statement in DROP:
+            await execute(pool, statement)
+        pool.close()
+        await pool.wait_closed()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--answers", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--guilds", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.answers, args.users, args.guilds))
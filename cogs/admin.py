@@ -1,15 +1,27 @@
 from __future__ import annotations
 
+import io
+import time
+from collections import Counter
+
 import disnake
 from disnake.ext import commands
 
 from core.bot import PokeMare
+from core.profiler import CommandProfiler, StackSampler
+
+PROFILED_COMMANDS = ("gtp_command", "lb_cmd", "profile")
 
 
 class Admin(commands.Cog):
     def __init__(self, bot: PokeMare) -> None:
         self.bot = bot
         self.ignored = True
+        self.sampler: StackSampler | None = None
+        self.profiler = CommandProfiler(bot)
+
+    def cog_unload(self) -> None:
+        self.profiler.unwrap()
 
     @commands.Cog.listener()
     async def on_slash_command_error(
@@ -25,6 +37,219 @@ class Admin(commands.Cog):
         else:
             raise error
 
+    @commands.command(name="prewarm")
+    @commands.is_owner()
+    async def prewarm(self, ctx: commands.Context) -> None:
+        sprites = [
+            f"revealed_pokemons/{record.dex_id}.png" for record in self.bot.pokedex
+        ]
+        sprites.extend(
+            f"pokemon_revealed/{form.image}" for form in self.bot.pokedex.forms
+        )
+        started = time.perf_counter()
+        async with ctx.typing():
+            rendered = await self.bot.images.prewarm(sprites)
+        await ctx.send(
+            embed=disnake.Embed(
+                description=f"Rendered `{rendered}/{len(sprites)}` sprites in `{time.perf_counter() - started:.1f}s`.",
+                color=disnake.Color.green(),
+            )
+        )
+
+    @commands.command(name="cluster")
+    @commands.is_owner()
+    async def cluster(self, ctx: commands.Context) -> None:
+        if self.bot.cluster is None or not self.bot.cluster.connected:
+            stats = {
+                "0": {
+                    "guilds": len(self.bot.guilds),
+                    "shards": list(self.bot.shards),
+                    "latency": self.bot.latency,
+                }
+            }
+        else:
+            stats = await self.bot.cluster.request("stats")
+        embed = disnake.Embed(
+            title=f"{sum(s['guilds'] for s in stats.values())} guilds",
+            color=disnake.Color.green(),
+        )
+        for cluster_id, cluster in sorted(stats.items(), key=lambda i: int(i[0])):
+            embed.add_field(
+                name=f"Cluster {cluster_id}",
+                value=f"Shards `{cluster['shards']}`\nGuilds `{cluster['guilds']}`\n"
+                f"Latency `{cluster['latency'] * 1000:.0f}ms`",
+            )
+        await ctx.send(embed=embed)
+
+    @commands.command(name="metrics")
+    @commands.is_owner()
+    async def metrics(self, ctx: commands.Context) -> None:
+        metrics = self.bot.metrics
+        embed = disnake.Embed(title="Metrics", color=disnake.Color.green())
+        commands_summary = "\n".join(
+            f"`/{name}` {h.count}x p50 `{h.quantile(0.5) * 1000:.0f}ms` "
+            f"p99 `{h.quantile(0.99) * 1000:.0f}ms` "
+            f"errors `{sum(c for (n, _), c in metrics.errors.items() if n == name)}`"
+            for name, h in sorted(metrics.commands.items())
+        )
+        embed.add_field("Commands", commands_summary or "None yet", inline=False)
+        queries_summary = "\n".join(
+            f"`{verb}` {h.count}x p50 `{h.quantile(0.5) * 1000:.1f}ms` "
+            f"p99 `{h.quantile(0.99) * 1000:.1f}ms`"
+            for verb, h in sorted(metrics.queries.items())
+        )
+        embed.add_field("Database", queries_summary or "None yet", inline=False)
+        gauges = metrics.gauges()
+        embed.add_field(
+            "Runtime",
+            f"Pool wait p99 `{metrics.pool_wait.quantile(0.99) * 1000:.1f}ms`\n"
+            f"Active rounds `{gauges['pokemare_active_rounds']}`\n"
+            f"Stats cache hit ratio `{self.bot.stats_db.cache.hit_ratio:.0%}`\n"
+            f"Gateway latency `{self.bot.latency * 1000:.0f}ms`\n"
+            f"Loop lag p99 `{self.bot.watchdog.lag_quantile(0.99) * 1000:.1f}ms`",
+            inline=False,
+        )
+        await ctx.send(embed=embed)
+
+    @commands.command(name="sample")
+    @commands.is_owner()
+    async def sample(
+        self, ctx: commands.Context, seconds: float = 10.0, interval_ms: float = 5.0
+    ) -> None:
+        if self.sampler is not None:
+            return await ctx.send("A sample is already running.")
+        seconds = min(max(seconds, 1.0), 300.0)
+        self.sampler = StackSampler(max(interval_ms, 1.0) / 1000)
+        try:
+            async with ctx.typing():
+                collapsed = await self.sampler.sample_for(seconds)
+            samples = self.sampler.samples
+            # where the event loop thread itself spent its samples
+            leaves = Counter()
+            for line in collapsed.splitlines():
+                stack, count = line.rsplit(" ", 1)
+                if stack.startswith("MainThread;"):
+                    leaves[stack.rsplit(";", 1)[1]] += int(count)
+        finally:
+            self.sampler = None
+        hot = "\n".join(
+            f"`{count / samples:5.1%}` {frame[:90]}"
+            for frame, count in leaves.most_common(8)
+        )
+        await ctx.send(
+            embed=disnake.Embed(
+                title=f"{samples} samples over {seconds:.0f}s",
+                description=f"Event loop, innermost frames:\n{hot or 'None'}",
+                color=disnake.Color.green(),
+            ),
+            file=disnake.File(
+                io.BytesIO(collapsed.encode()),
+                filename=f"stacks-{time.strftime('%Y%m%d-%H%M%S')}.folded",
+            ),
+        )
+
+    @commands.group(name="cprofile", invoke_without_command=True)
+    @commands.is_owner()
+    async def cprofile(self, ctx: commands.Context) -> None:
+        wrapped = ", ".join(f"`/{name}`" for name in self.profiler.wrapped)
+        await ctx.send(
+            f"Profiling {wrapped or 'nothing'}. "
+            "Use `start [commands]`, `show [count]`, `stop` or `reset`."
+        )
+
+    @cprofile.command(name="start")
+    @commands.is_owner()
+    async def cprofile_start(self, ctx: commands.Context, *names: str) -> None:
+        unknown = [n for n in names or PROFILED_COMMANDS if not self.profiler.wrap(n)]
+        wrapped = ", ".join(f"`/{name}`" for name in self.profiler.wrapped)
+        message = f"Profiling every invocation of {wrapped or 'nothing'}."
+        if unknown:
+            message += f" No slash command called {', '.join(unknown)}."
+        await ctx.send(message)
+
+    @cprofile.command(name="stop")
+    @commands.is_owner()
+    async def cprofile_stop(self, ctx: commands.Context) -> None:
+        self.profiler.unwrap()
+        await ctx.send("Stopped profiling, the collected stats are kept.")
+
+    @cprofile.command(name="reset")
+    @commands.is_owner()
+    async def cprofile_reset(self, ctx: commands.Context) -> None:
+        self.profiler.reset()
+        await ctx.send("Cleared the collected stats.")
+
+    @cprofile.command(name="show")
+    @commands.is_owner()
+    async def cprofile_show(self, ctx: commands.Context, count: int = 10) -> None:
+        if not self.profiler.stats:
+            return await ctx.send("No profiled invocations yet.")
+        embed = disnake.Embed(title="Hottest functions", color=disnake.Color.green())
+        files = []
+        for key in sorted(self.profiler.stats):
+            calls = self.profiler.invocations[key]
+            lines = []
+            for ncalls, tottime, cumtime, function in self.profiler.top(key, count):
+                line = (
+                    f"`{tottime / calls * 1000:7.2f}ms` `{cumtime / calls * 1000:7.2f}ms`"
+                    f" {ncalls}x {function[:60]}"
+                )
+                if sum(len(done) + 1 for done in lines) + len(line) > 1024:
+                    break
+                lines.append(line)
+            embed.add_field(
+                f"/{key}, {calls} invocations (own / total per invocation)",
+                "\n".join(lines),
+                inline=False,
+            )
+            files.append(
+                disnake.File(self.profiler.dump(key), filename=f"{key}.pstats")
+            )
+        await ctx.send(embed=embed, files=files[:10])
+
+    @commands.group(name="loop", invoke_without_command=True)
+    @commands.is_owner()
+    async def loop_health(self, ctx: commands.Context, count: int = 10) -> None:
+        watchdog = self.bot.watchdog
+        embed = disnake.Embed(
+            title="Event loop",
+            description=f"Lag over the last minute: "
+            f"p50 `{watchdog.lag_quantile(0.5) * 1000:.1f}ms` "
+            f"p99 `{watchdog.lag_quantile(0.99) * 1000:.1f}ms` "
+            f"max `{watchdog.lag_quantile(1.0) * 1000:.0f}ms`\n"
+            f"Since start: `{watchdog.slow_callbacks}` callbacks over "
+            f"`{watchdog.slow * 1000:.0f}ms`, `{watchdog.stalls}` stalls over "
+            f"`{watchdog.block * 1000:.0f}ms`",
+            color=disnake.Color.green(),
+        )
+        blamed = "\n".join(
+            f"`{events}x` `{total * 1000:6.0f}ms` worst `{worst * 1000:.0f}ms` {site[:80]}"
+            for site, events, total, worst in watchdog.blamed(count)
+        )
+        embed.add_field("Blocking call sites", blamed or "None seen", inline=False)
+        recent = "\n".join(
+            f"<t:{int(event.when)}:R> {event.kind} `{event.duration * 1000:.0f}ms` "
+            f"{event.site[:70]}"
+            for event in list(watchdog.events)[-5:][::-1]
+        )
+        embed.add_field("Latest", recent or "None seen", inline=False)
+        await ctx.send(embed=embed)
+
+    @loop_health.command(name="stalls")
+    @commands.is_owner()
+    async def loop_stalls(self, ctx: commands.Context, count: int = 10) -> None:
+        stalls = [e for e in self.bot.watchdog.events if e.kind == "stall"][-count:]
+        if not stalls:
+            return await ctx.send("No stalls recorded.")
+        report = "\n".join(
+            f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(e.when))} "
+            f"blocked {e.duration * 1000:.0f}ms at {e.site}\n{e.stack}"
+            for e in reversed(stalls)
+        )
+        await ctx.send(
+            file=disnake.File(io.BytesIO(report.encode()), filename="stalls.txt")
+        )
+
 
 def setup(bot: PokeMare):
     bot.add_cog(Admin(bot))
@@ -1,59 +1,178 @@
 from __future__ import annotations
 
+import asyncio
+import itertools
+import json
 import random
+from functools import partial
+from typing import Any
 
 import disnake
 from disnake.ext import commands
 import datetime
 
 from core.bot import PokeMare
+from core.cluster import shared_cooldown
+from core.dispatcher import AnswerCheck, PendingAnswer, expire
+from core.images import Variant, as_file
+from core.lyrics import LyricsIndex
+
+
+class Round:
+    __slots__ = (
+        "id",
+        "game",
+        "channel_id",
+        "user_id",
+        "answer",
+        "future",
+        "timer",
+        "pending",
+    )
+
+    def __init__(
+        self, id: int, game: str, channel_id: int, user_id: int, answer: Any
+    ) -> None:
+        self.id = id
+        self.game = game
+        self.channel_id = channel_id
+        self.user_id = user_id
+        self.answer = answer
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.timer = None
+        self.pending: PendingAnswer | None = None
+
+
+class GameEngine:
+    """Round bookkeeping shared by every guessing game.
+
+    Rounds are compact slot objects indexed by id. Text answers arrive
+    through the bot's answer dispatcher, button answers through
+    :meth:`resolve`, and every deadline sits on the bot's single timer
+    wheel instead of a coroutine-owned timeout per round.
+    """
+
+    def __init__(self, bot: PokeMare) -> None:
+        self.bot = bot
+        self.rounds: dict[int, Round] = {}
+        self._ids = itertools.count(1)
+
+    def __len__(self) -> int:
+        return len(self.rounds)
+
+    def start(
+        self,
+        game: str,
+        channel_id: int,
+        user_id: int,
+        answer: Any,
+        timeout: float,
+        check: AnswerCheck | None = None,
+    ) -> Round:
+        round_ = Round(next(self._ids), game, channel_id, user_id, answer)
+        round_.timer = self.bot.timers.schedule(timeout, partial(expire, round_.future))
+        if check is not None:
+            round_.pending = self.bot.answers.register(
+                channel_id, user_id, check, round_.future
+            )
+        self.rounds[round_.id] = round_
+        return round_
+
+    def get(self, round_id: int) -> Round | None:
+        return self.rounds.get(round_id)
+
+    def resolve(self, round_id: int, result: Any) -> bool:
+        round_ = self.rounds.get(round_id)
+        if round_ is None or round_.future.done():
+            return False
+        round_.future.set_result(result)
+        return True
+
+    def finish(self, round_: Round) -> None:
+        self.rounds.pop(round_.id, None)
+        round_.timer.cancel()
+        if round_.pending is not None:
+            self.bot.answers.discard(round_.channel_id, round_.user_id, round_.pending)
+        if not round_.future.done():
+            round_.future.cancel()
+
+    async def play(self, round_: Round) -> Any:
+        """Wait for the round's answer; raises ``asyncio.TimeoutError`` on expiry."""
+        try:
+            return await round_.future
+        finally:
+            self.finish(round_)
 
 
 class GTPObject:
     def __init__(self, bot, pokemon_id: int) -> None:
         self.bot: PokeMare = bot
         self.pokemon_id: int = pokemon_id
+        self.variant = Variant.random()
 
     @property
-    def hidden_image(self) -> str:
-        return f"https://raw.githubusercontent.com/PokeMare/resources/main/hidden_pokemons/{self.pokemon_id}.png"
+    def sprite(self) -> str:
+        return f"revealed_pokemons/{self.pokemon_id}.png"
 
-    @property
-    def revealed_image(self) -> disnake.File:
-        return f"https://raw.githubusercontent.com/PokeMare/resources/main/revealed_pokemons/{self.pokemon_id}.png"
-    
-    
- class WTPObject:
-    def __init__(self, bot, pokemon_name: str) - > None:
+    async def hidden_image(self) -> disnake.File:
+        return as_file(
+            await self.bot.images.silhouette(self.sprite, self.variant), "hidden.png"
+        )
+
+    async def revealed_image(self) -> disnake.File:
+        return as_file(
+            await self.bot.images.reveal(self.sprite, self.variant), "revealed.png"
+        )
+
+
+class WTPObject:
+    def __init__(self, bot, pokemon_name: str) -> None:
         self.bot: PokeMare = bot
         self.pokemon_name: str = pokemon_name
-            
-    @property
-    def hidden_image(self) -> str:
-        return f"https://raw.githubusercontent.com/PokeMare/resources/main/pokemon_hidden/{self.pokemon_name}"
+        self.variant = Variant.random()
 
     @property
-    def revealed_image(self) -> disnake.File:
-        return f"https://raw.githubusercontent.com/PokeMare/resources/main/pokemon_revealed/{self.pokemon_name}"
+    def sprite(self) -> str:
+        return f"pokemon_revealed/{self.pokemon_name}"
+
+    async def hidden_image(self) -> disnake.File:
+        return as_file(
+            await self.bot.images.silhouette(self.sprite, self.variant), "hidden.png"
+        )
+
+    async def revealed_image(self) -> disnake.File:
+        return as_file(
+            await self.bot.images.reveal(self.sprite, self.variant), "revealed.png"
+        )
 
 
 class Games(commands.Cog):
     def __init__(self, bot: PokeMare) -> None:
         self.bot = bot
+        self.engine = GameEngine(bot)
+        with open("data/trivia.json", "r", encoding="utf-8") as file:
+            trivia = json.load(file)
+        self.trivia_questions: list[dict] = trivia["trivia_multiple_choice"]
+        self.songs = LyricsIndex.from_file("data/songs.json")
         super().__init__()
 
     @commands.slash_command(
         name="whos_that_pokemon",
         description="Guess the correct pokemon to reach the leaderboard!",
     )
-    @commands.cooldown(1, 20, type=commands.BucketType.user)
+    @shared_cooldown(1, 20)
     async def gtp_command(self, interaction: disnake.AppCommandInter) -> None:
         p_id = random.randint(1, 151)
         gtp = GTPObject(self.bot, p_id)
-        pokemon: dict | None = self.bot.pokemon_dict.get(str(p_id))
-        pokemon_name = pokemon.get("name")
-        pokemon_info = pokemon.get("description")
+        pokemon = self.bot.pokedex.by_id(p_id)
+        pokemon_name = pokemon.name
 
+        # rendering can miss the cache, so acknowledge the interaction first;
+        # both images are ready before the round and its deadline are shown
+        await interaction.response.defer()
+        hidden, revealed = await asyncio.gather(
+            gtp.hidden_image(), gtp.revealed_image()
+        )
         hidden_embed = (
             disnake.Embed(
                 color=disnake.Color.yellow(),
@@ -65,33 +184,161 @@ class Games(commands.Cog):
             )
             .set_author(name="Who's that Pokemon!")
             .set_footer(text="Timer may not show up on phone. It's 30 seconds.")
+            .set_image(file=hidden)
         )
-        hidden_embed.set_image(url=gtp.hidden_image)
-
-        await interaction.send(embed=hidden_embed)
         revealed_embed = disnake.Embed(
             description=f"> {self.bot.get_emoji(866894907741831218)} The pokemon was: {pokemon_name.title()}"
+        ).set_image(file=revealed)
+        round_ = self.engine.start(
+            "whos_that_pokemon",
+            interaction.channel.id,
+            interaction.user.id,
+            pokemon_name,
+            timeout=30,
+            check=lambda m: m.content.strip() == str(p_id)
+            or self.bot.matcher.matches(m.content, pokemon_name),
         )
-        revealed_embed.set_image(url=gtp.revealed_image)
         try:
-            msg: disnake.Message = await self.bot.wait_for(
-                "message",
-                check=lambda m: m.author == interaction.user
-                and m.channel == interaction.channel
-                and m.content.lower() in (str(p_id), pokemon_name.lower()),
-                timeout=30,
-            )
-        except:
+            await interaction.edit_original_message(embed=hidden_embed)
+        except BaseException:
+            self.engine.finish(round_)
+            raise
+        try:
+            await self.engine.play(round_)
+        except asyncio.TimeoutError:
             revealed_embed.color = disnake.Color.red()
             revealed_embed.title = "Timed Out!"
-            return await interaction.edit_original_message(embed=revealed_embed)
+            return await interaction.edit_original_message(
+                embed=revealed_embed, attachments=[]
+            )
         reward = random.randint(30, 50)
         await self.bot.currency_db.add_coins_to(interaction.user.id, reward)
         await self.bot.gtp_db.add_guess(interaction.author)
         revealed_embed.description += f"\n> `🎁` Added `{reward} Pokédollars` {self.bot.get_emoji(941929762912342027)} to your account."
         revealed_embed.color = disnake.Color.green()
         revealed_embed.title = "Correct!"
-        await interaction.edit_original_message(embed=revealed_embed)
+        await interaction.edit_original_message(embed=revealed_embed, attachments=[])
+
+    @commands.slash_command(
+        name="trivia", description="Answer a pokemon trivia question for Pokédollars!"
+    )
+    @shared_cooldown(1, 20)
+    async def trivia_command(self, interaction: disnake.AppCommandInter) -> None:
+        question = random.choice(self.trivia_questions)
+        options: list[str] = question["options"]
+        round_ = self.engine.start(
+            "trivia",
+            interaction.channel.id,
+            interaction.user.id,
+            options.index(question["answer"]),
+            timeout=20,
+        )
+        embed = (
+            disnake.Embed(
+                color=disnake.Color.yellow(),
+                description=(
+                    f"> **{question['question']}**\n"
+                    f"> `🎁` Rewards: `10-20 Pokédollars`.\n"
+                    f"> `⏰` Respond <{disnake.utils.format_dt(datetime.datetime.now()+datetime.timedelta(seconds=20),style='R')}>"
+                ),
+            )
+            .set_author(name="Pokemon Trivia!")
+            .set_footer(text="Timer may not show up on phone. It's 20 seconds.")
+        )
+        components = [
+            disnake.ui.Button(
+                label=option,
+                style=disnake.ButtonStyle.gray,
+                custom_id=f"trivia:{round_.id}:{index}",
+            )
+            for index, option in enumerate(options)
+        ]
+        await interaction.send(embed=embed, components=components)
+
+        result = disnake.Embed(description=question["response"])
+        try:
+            choice: int = await self.engine.play(round_)
+        except asyncio.TimeoutError:
+            result.color = disnake.Color.red()
+            result.title = "Timed Out!"
+            return await interaction.edit_original_message(embed=result, components=[])
+        if choice == round_.answer:
+            reward = random.randint(10, 20)
+            await self.bot.currency_db.add_coins_to(interaction.user.id, reward)
+            result.description += f"\n\n> `🎁` Added `{reward} Pokédollars` {self.bot.get_emoji(941929762912342027)} to your account."
+            result.color = disnake.Color.green()
+            result.title = "Correct!"
+        else:
+            result.color = disnake.Color.red()
+            result.title = f"Wrong, you picked {options[choice]}!"
+        await interaction.edit_original_message(embed=result, components=[])
+
+    @commands.slash_command(
+        name="guess_the_song",
+        description="Name the pokemon song from its lyrics, or sing the next lines!",
+    )
+    @shared_cooldown(1, 20)
+    async def song_command(self, interaction: disnake.AppCommandInter) -> None:
+        song, shown = self.songs.snippet()
+        snippet = "\n".join(f"> *{song.lines[line]}*" for line in shown)
+        embed = (
+            disnake.Embed(
+                color=disnake.Color.yellow(),
+                description=(
+                    f"{snippet}\n\n"
+                    f"> Respond with the song title or a lyric line that comes later.\n"
+                    f"> `🎁` Rewards: `20-40 Pokédollars`.\n"
+                    f"> `⏰` Respond <{disnake.utils.format_dt(datetime.datetime.now()+datetime.timedelta(seconds=30),style='R')}>"
+                ),
+            )
+            .set_author(name="Guess the Song!")
+            .set_footer(text="Timer may not show up on phone. It's 30 seconds.")
+        )
+        await interaction.send(embed=embed)
+
+        round_ = self.engine.start(
+            "guess_the_song",
+            interaction.channel.id,
+            interaction.user.id,
+            song.id,
+            timeout=30,
+            check=lambda m: self.songs.matches(m.content, song, shown[-1]),
+        )
+        result = disnake.Embed(
+            description=f"> The song was: [{song.title}]({song.link}) by {song.artist}"
+        )
+        if song.image:
+            result.set_thumbnail(url=song.image)
+        try:
+            await self.engine.play(round_)
+        except asyncio.TimeoutError:
+            result.color = disnake.Color.red()
+            result.title = "Timed Out!"
+            return await interaction.edit_original_message(embed=result)
+        reward = random.randint(20, 40)
+        await self.bot.currency_db.add_coins_to(interaction.user.id, reward)
+        result.description += f"\n> `🎁` Added `{reward} Pokédollars` {self.bot.get_emoji(941929762912342027)} to your account."
+        result.color = disnake.Color.green()
+        result.title = "Correct!"
+        await interaction.edit_original_message(embed=result)
+
+    @commands.Cog.listener()
+    async def on_button_click(self, inter: disnake.MessageInteraction) -> None:
+        game, _, rest = inter.component.custom_id.partition(":")
+        if game != "trivia":
+            return
+        round_id, _, choice = rest.partition(":")
+        round_ = self.engine.get(int(round_id))
+        if round_ is None:
+            return await inter.response.send_message(
+                "This question has already ended.", ephemeral=True
+            )
+        if inter.author.id != round_.user_id:
+            return await inter.response.send_message(
+                "This question isn't yours to answer.", ephemeral=True
+            )
+        await inter.response.defer()
+        self.engine.resolve(round_.id, int(choice))
 
 
 def setup(bot: PokeMare) -> None:
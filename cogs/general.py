@@ -6,6 +6,7 @@ import disnake
 from disnake.ext import commands
 
 from core.bot import PokeMare
+from core.images import as_file
 
 
 class General(commands.Cog):
@@ -19,16 +20,11 @@ class General(commands.Cog):
         self, inter: disnake.AppCommandInteraction, user: disnake.User = None
     ) -> None:
         user = user or inter.user
-        embed = (
-            disnake.Embed(
-                description=f"""
-Balance: `{await self.bot.currency_db.get_coins_for(user.id)}` {self.bot.get_emoji(941929762912342027)}
-Whos that Pokemon Guesses: `{await self.bot.gtp_db.get_guesses_for_user(user)}`
-            """,
-                color=disnake.Color.random(),
-            )
-            .set_author(name=user.name)
-            .set_thumbnail(url=user.display_avatar.url)
+        await inter.response.defer()
+        coins, guesses = await self.bot.stats_db.get_stats_for(user.id)
+        card = await self.bot.profile_cards.render(user, coins, guesses)
+        embed = disnake.Embed(color=disnake.Color.random()).set_image(
+            file=as_file(card, "profile.png")
         )
         await inter.send(embed=embed)
 
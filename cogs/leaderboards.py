@@ -3,6 +3,45 @@ from disnake.ext import commands
 
 from core.bot import PokeMare
 
+PER_PAGE = 10
+
+
+class LocalLeaderboardView(disnake.ui.View):
+    def __init__(
+        self, cog: "Leaderboard", author: disnake.abc.User, guild: disnake.Guild
+    ) -> None:
+        super().__init__(timeout=120)
+        self.cog = cog
+        self.author = author
+        self.guild = guild
+        self.page = 0
+
+    async def interaction_check(self, inter: disnake.MessageInteraction) -> bool:
+        return inter.author.id == self.author.id
+
+    async def show(self, inter: disnake.MessageInteraction, page: int) -> None:
+        rows = await self.cog.bot.gtp_db.local_leaderboard(
+            self.guild.id, page, PER_PAGE
+        )
+        if not rows:
+            return await inter.response.defer()
+        self.page = page
+        await inter.response.edit_message(
+            embed=await self.cog.local_embed(self.guild, self.author, page, rows)
+        )
+
+    @disnake.ui.button(emoji="◀️", style=disnake.ButtonStyle.gray)
+    async def previous_page(
+        self, button: disnake.ui.Button, inter: disnake.MessageInteraction
+    ) -> None:
+        await self.show(inter, max(self.page - 1, 0))
+
+    @disnake.ui.button(emoji="▶️", style=disnake.ButtonStyle.gray)
+    async def next_page(
+        self, button: disnake.ui.Button, inter: disnake.MessageInteraction
+    ) -> None:
+        await self.show(inter, self.page + 1)
+
 
 class Leaderboard(commands.Cog):
     def __init__(self, bot: PokeMare) -> None:
@@ -21,16 +60,14 @@ class Leaderboard(commands.Cog):
             3: self.bot.get_emoji(986111389376589844),
         }
         if lb_type == "whos that pokemon global":
-            data_ = await self.bot.gtp_db.global_leaderboard()
-            data = data_[:10]
-            pos = 0
-            for u in data_:
-                pos += 1
-                if u[0] == interaction.user:
-                    break
+            data = await self.bot.gtp_db.global_leaderboard(10)
+            pos = (
+                self.bot.gtp_db.global_rank(interaction.user.id)
+                or len(self.bot.gtp_db.rank_index) + 1
+            )
             embed = (
                 disnake.Embed(
-                    description=f"Displaying top 10 global trainers.\n\nYou are ranked `#{pos}` with `{await self.bot.gtp_db.get_guesses_for_user(interaction.user)}` correct guesses.",
+                    description=f"Displaying top 10 global trainers.\n\nYou are ranked `#{pos}` with `{self.bot.gtp_db.rank_index.score(interaction.user.id)}` correct guesses.",
                     color=disnake.Color.purple(),
                 )
                 .set_author(
@@ -55,12 +92,63 @@ class Leaderboard(commands.Cog):
             embed.add_field(
                 name="❔ Guesses", value="\n".join(make_string(i[1]) for i in data)
             )
+        elif lb_type == "whos that pokemon server" and interaction.guild:
+            rows = await self.bot.gtp_db.local_leaderboard(
+                interaction.guild.id, 0, PER_PAGE
+            )
+            return await interaction.send(
+                embed=await self.local_embed(
+                    interaction.guild, interaction.author, 0, rows
+                ),
+                view=LocalLeaderboardView(self, interaction.author, interaction.guild),
+            )
+        else:
+            embed = disnake.Embed(
+                color=disnake.Color.red(), description="Unknown leaderboard type."
+            )
 
         await interaction.send(embed=embed)
 
+    async def local_embed(
+        self,
+        guild: disnake.Guild,
+        author: disnake.Member,
+        page: int,
+        rows: list[tuple[int, int]],
+    ) -> disnake.Embed:
+        embed = (
+            disnake.Embed(
+                description=f"Displaying top trainers of {guild.name}.\n\nYou have `{await self.bot.gtp_db.get_guesses_for_member(author)}` correct guesses in this server.",
+                color=disnake.Color.purple(),
+            )
+            .set_author(
+                name="SERVER LEADERBOARD", icon_url=self.bot.user.display_avatar
+            )
+            .set_footer(text=f"Page {page + 1} • Use /profile to see your stats.")
+        )
+        if guild.icon:
+            embed.set_thumbnail(url=guild.icon.url)
+        if not rows:
+            embed.add_field(name="Trainers", value="Nobody has guessed here yet.")
+            return embed
+        start = page * PER_PAGE + 1
+        users = await self.bot.user_directory.resolve(user_id for user_id, _ in rows)
+        embed.add_field(
+            name=f"{self.bot.get_emoji(937618424169914398)} Trainers",
+            value="\n".join(
+                f"`{pos}.` `{users[user_id]}`"
+                for pos, (user_id, _) in enumerate(rows, start=start)
+            ),
+        )
+        embed.add_field(
+            name="❔ Guesses",
+            value="\n".join(f"`💠 {guesses}`" for _, guesses in rows),
+        )
+        return embed
+
     @lb_cmd.autocomplete("lb_type")
     async def lb_type_ac(self, inter: disnake.AppCommandInter, string: str) -> None:
-        all = ["whos that pokemon global"]
+        all = ["whos that pokemon global", "whos that pokemon server"]
         if not string:
             return all
         return [a for a in all if a.lower().startswith(string)]
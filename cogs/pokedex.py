@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+from collections import Counter
+
+import disnake
+from disnake.ext import commands
+
+from core.bot import PokeMare
+from core.filters import FilterError
+from core.images import RESOURCES_URL
+from core.pokedex import FormRecord, PokemonRecord, normalize
+
+PER_PAGE = 15
+
+
+class SearchView(disnake.ui.View):
+    def __init__(
+        self, cog: Pokedex, author: disnake.abc.User, query: str, bits: int
+    ) -> None:
+        super().__init__(timeout=120)
+        self.cog = cog
+        self.author = author
+        self.query = query
+        self.bits = bits
+        self.pages = -(-cog.bot.filters.count(bits) // PER_PAGE)
+        self.page = 0
+
+    async def interaction_check(self, inter: disnake.MessageInteraction) -> bool:
+        return inter.author.id == self.author.id
+
+    async def show(self, inter: disnake.MessageInteraction, page: int) -> None:
+        if not 0 <= page < self.pages:
+            return await inter.response.defer()
+        self.page = page
+        await inter.response.edit_message(
+            embed=self.cog.search_embed(self.query, self.bits, page)
+        )
+
+    @disnake.ui.button(emoji="◀️", style=disnake.ButtonStyle.gray)
+    async def previous_page(
+        self, button: disnake.ui.Button, inter: disnake.MessageInteraction
+    ) -> None:
+        await self.show(inter, self.page - 1)
+
+    @disnake.ui.button(emoji="▶️", style=disnake.ButtonStyle.gray)
+    async def next_page(
+        self, button: disnake.ui.Button, inter: disnake.MessageInteraction
+    ) -> None:
+        await self.show(inter, self.page + 1)
+
+
+class Pokedex(commands.Cog):
+    def __init__(self, bot: PokeMare) -> None:
+        self.bot = bot
+        # lookups per normalized name, ranks autocomplete suggestions
+        self.popularity: Counter[str] = Counter()
+        self.embeds: dict[str, disnake.Embed] = {}
+        super().__init__()
+
+    def record_embed(self, record: PokemonRecord, title: str) -> disnake.Embed:
+        stats = " • ".join(
+            f"{name.replace('_', ' ').title()} `{value}`"
+            for name, value in zip(PokemonRecord.STAT_NAMES, record.stats)
+        )
+        embed = (
+            disnake.Embed(
+                title=f"#{record.dex_id:03} {title}",
+                description=record.description,
+                color=disnake.Color.red(),
+            )
+            .add_field("Type", " / ".join(record.types))
+            .add_field("Species", " ".join(record.species))
+            .add_field("Abilities", ", ".join(record.abilities))
+            .add_field("Height", record.height)
+            .add_field("Weight", record.weight)
+            .add_field("Egg Groups", ", ".join(record.egg_groups) or "None")
+            .add_field("Gender", ", ".join(record.gender) or "Genderless")
+            .add_field("Generation", record.generation)
+            .add_field("Evolution", " → ".join(record.evolution_line) or "None")
+            .add_field("Base Stats", stats, inline=False)
+            .set_thumbnail(url=f"{RESOURCES_URL}/revealed_pokemons/{record.dex_id}.png")
+        )
+        return embed
+
+    def form_embed(self, form: FormRecord) -> disnake.Embed:
+        if form.base is not None:
+            embed = self.record_embed(form.base, form.name.title())
+        else:
+            embed = disnake.Embed(
+                title=form.name.title(),
+                description="No Pokédex data for this Pokémon yet.",
+                color=disnake.Color.red(),
+            )
+        return embed.set_thumbnail(url=f"{RESOURCES_URL}/pokemon_revealed/{form.image}")
+
+    def entry(self, name: str) -> tuple[str, disnake.Embed] | None:
+        """The entry's canonical name and its embed, built once per pokemon."""
+        record, form = self.bot.pokedex.aliases.get(normalize(name), (-1, -1))
+        if record >= 0:
+            record = self.bot.pokedex.record(record)
+            key = normalize(record.display_name)
+            if key not in self.embeds:
+                self.embeds[key] = self.record_embed(record, record.display_name)
+        elif form >= 0:
+            form = self.bot.pokedex.form_record(form)
+            key = normalize(form.name)
+            if key not in self.embeds:
+                self.embeds[key] = self.form_embed(form)
+        else:
+            return None
+        return key, self.embeds[key]
+
+    def search_embed(self, query: str, bits: int, page: int) -> disnake.Embed:
+        filters = self.bot.filters
+        total = filters.count(bits)
+        lines = []
+        for position in filters.page(bits, page, PER_PAGE):
+            record = self.bot.pokedex.record(position)
+            lines.append(
+                f"`#{record.dex_id:03}` **{record.display_name}** "
+                f"· {' / '.join(record.types)}"
+            )
+        return disnake.Embed(
+            title=f"{total} Pokémon match `{query[:200]}`",
+            description="\n".join(lines) or "Nothing matches.",
+            color=disnake.Color.red(),
+        ).set_footer(text=f"Page {page + 1} of {max(-(-total // PER_PAGE), 1)}")
+
+    @commands.slash_command(name="pokedex")
+    async def pokedex(self, inter: disnake.AppCommandInter) -> None:
+        pass
+
+    @pokedex.sub_command(name="entry", description="Look up a pokemon's Pokédex entry.")
+    async def pokedex_entry(self, inter: disnake.AppCommandInter, name: str) -> None:
+        entry = self.entry(name)
+        if entry is None:
+            return await inter.send(
+                embed=disnake.Embed(
+                    description=f"No pokemon called `{name}`.",
+                    color=disnake.Color.red(),
+                ),
+                ephemeral=True,
+            )
+        key, embed = entry
+        self.popularity[key] += 1
+        await inter.send(embed=embed)
+
+    @pokedex_entry.autocomplete("name")
+    async def name_autocomplete(
+        self, inter: disnake.AppCommandInter, string: str
+    ) -> list[str]:
+        return self.bot.completions.complete(string, self.popularity)
+
+    @pokedex.sub_command(
+        name="search",
+        description="Filter pokemon, e.g. type:grass,fire -type:flying ability:chlorophyll or egg:monster",
+    )
+    async def pokedex_search(self, inter: disnake.AppCommandInter, query: str) -> None:
+        try:
+            bits = self.bot.filters.evaluate(query)
+        except FilterError as error:
+            return await inter.send(
+                embed=disnake.Embed(description=str(error), color=disnake.Color.red()),
+                ephemeral=True,
+            )
+        embed = self.search_embed(query, bits, 0)
+        if self.bot.filters.count(bits) <= PER_PAGE:
+            return await inter.send(embed=embed)
+        await inter.send(embed=embed, view=SearchView(self, inter.author, query, bits))
+
+
+def setup(bot: PokeMare) -> None:
+    bot.add_cog(Pokedex(bot))
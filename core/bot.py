@@ -1,72 +1,240 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import datetime
-import json
 import os
+import time
+from typing import Awaitable
+
 import aiohttp
 
-import aiomysql
 import disnake
 import dotenv
+from database.access import Database
+from database.backends import database_from_env
+from database.buffer import RewardBuffer
+from database.directory import UserDirectory
 from database.gtp_stats import GuessThePokemonDatabase
+from database.migrations import run_migrations
+from database.stats import UserStats
 from database.user import Currency
 
 
 from disnake.ext import commands
 
+from .cards import ProfileCards
+from .cluster import ClusterClient
+from .completion import PrefixIndex
+from .dispatcher import AnswerDispatcher
+from .filters import FilterIndex
+from .images import SpriteRenderer
+from .matcher import NameMatcher
+from .metrics import Metrics
+from .pokedex import Pokedex
+from .timers import TimerWheel
+from .watchdog import LoopWatchdog
+
+
+def gateway_options(low_memory: bool) -> dict:
+    """Intents and cache settings for the gateway connection.
 
-class PokeMare(commands.Bot):
+    The low-memory profile caches no members besides the bot, never chunks
+    guilds and keeps ``MESSAGE_CACHE`` messages (none by default): the cogs
+    only read the author of an interaction, which arrives with it, and the
+    messages answering a running round.
+    """
+    intents = disnake.Intents.default()
+    intents.members = True
+    intents.message_content = True
+    if not low_memory:
+        return {"intents": intents}
+    # voice states are cached per member and nothing reads them
+    intents.voice_states = False
+    return {
+        "intents": intents,
+        "member_cache_flags": disnake.MemberCacheFlags.none(),
+        "chunk_guilds_at_startup": False,
+        "max_messages": int(os.getenv("MESSAGE_CACHE", 0)) or None,
+    }
+
+
+class PokeMare(commands.AutoShardedBot):
     boot_time: datetime.datetime
+    db: Database
+    pokedex: Pokedex
+    matcher: NameMatcher
+    completions: PrefixIndex
+    filters: FilterIndex
+    client_session: aiohttp.ClientSession
+    reward_buffer: RewardBuffer | None = None
+    cluster: ClusterClient | None = None
 
-    def __init__(self) -> None:
-        intents = disnake.Intents.default()
-        intents.members = True
-        intents.message_content = True
+    def __init__(
+        self,
+        shard_ids: list[int] | None = None,
+        shard_count: int | None = None,
+        cluster_id: int | None = None,
+    ) -> None:
+        self.startup_timings: dict[str, float] = {}
+        self._setup_done = False
+        self.low_memory = os.getenv("LOW_MEMORY", "").lower() in ("1", "true", "yes")
         super().__init__(
             command_prefix="p!",
             # test_guilds=[],
-            intents=intents,
+            **gateway_options(self.low_memory),
             strip_after_prefix=True,
             case_insensitive=True,
             help_command=None,
+            # sent with IDENTIFY, so every reconnect keeps the presence
+            activity=disnake.Activity(
+                type=disnake.ActivityType.listening, name="/help"
+            ),
+            status=disnake.Status.idle,
+            shard_ids=shard_ids,
+            shard_count=shard_count,
         )
+        self.cluster_id = cluster_id
         self.gtp_db = GuessThePokemonDatabase()
         self.currency_db = Currency()
-        self.load_extension("jishaku")
-        self.get_cog("Jishaku").ignored = True
-        self.load_extensions("cogs")
-        with open("data/pokemons.json", "r") as file:
-            self.pokemon_dict: dict = json.load(file)
-        with open("data/wtp.json", "r") as file:
-            self.wtp_dict = json.load(file)
+        self.stats_db = UserStats()
+        self.user_directory = UserDirectory()
+        self.metrics = Metrics(self)
+        self.watchdog = LoopWatchdog.from_env()
+        self.timers = TimerWheel(tick=float(os.getenv("TIMER_TICK", 0.1)))
+        self.answers = AnswerDispatcher(self, self.timers)
+        if self.low_memory:
+            self.answers.drop_idle_messages(("p!",))
+        self.images = SpriteRenderer(self)
+        self.profile_cards = ProfileCards(self.images)
+        with self.startup_phase("extensions"):
+            self.load_extension("jishaku")
+            self.get_cog("Jishaku").ignored = True
+            self.load_extensions("cogs")
+
+    @contextlib.contextmanager
+    def startup_phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.startup_timings[name] = time.perf_counter() - started
+
+    async def timed_phase(self, name: str, awaitable: Awaitable) -> None:
+        with self.startup_phase(name):
+            await awaitable
+
+    async def login(self, token: str) -> None:
+        # runs once per start(), before the gateway connects; on_ready fires
+        # again on every reconnect and must not build anything
+        await super().login(token)
+        await self.setup()
 
     async def on_ready(self) -> None:
         print("Bot is online!")
-        await self.setup()
 
     async def setup(self) -> None:
-        self.database_pool: aiomysql.Pool = await aiomysql.create_pool(
-            host=os.getenv("MYSQLHOST"),
-            user=os.getenv("MYSQLUSER"),
-            db=os.getenv("MYSQLDATABASE"),
-            password=os.getenv("MYSQLPASSWORD"),
-            port=int(os.getenv("MYSQLPORT")),
-            loop=asyncio.get_event_loop(),
-            autocommit=False,
-        )  # getting configs from the .env file and setting up the database
+        if self._setup_done:
+            return
+        self._setup_done = True
         self.boot_time = datetime.datetime.now()
-        await self.gtp_db.setup(self)
-        await self.currency_db.setup(self)
-        self.client_session = aiohttp.ClientSession()
-        await self.wait_until_ready()
-        await self.change_presence(
-            activity=disnake.Activity(
-                type=disnake.ActivityType.listening, name="/help"
-            ),
-            status=disnake.Status.idle,
+        if os.getenv("LOOP_WATCHDOG", "1").lower() not in ("0", "false", "no"):
+            # first, so blocking work during startup is caught as well
+            self.watchdog.start()
+        with self.startup_phase("setup"):
+            await asyncio.gather(
+                self.timed_phase("database", self.setup_database()),
+                self.timed_phase("data", asyncio.to_thread(self.load_data)),
+                self.timed_phase("cluster", self.setup_cluster()),
+            )
+            if self.cluster is not None:
+                self.user_directory.join_cluster(self.cluster)
+                self.stats_db.join_cluster(self.cluster)
+            self.client_session = aiohttp.ClientSession()
+            if os.getenv("METRICS_PORT"):
+                # clusters each get their own port, offset by cluster id
+                await self.metrics.serve(
+                    os.getenv("METRICS_HOST", "127.0.0.1"),
+                    int(os.environ["METRICS_PORT"]) + (self.cluster_id or 0),
+                )
+        print(
+            "Startup timings: "
+            + ", ".join(
+                f"{name} {seconds * 1000:.0f}ms"
+                for name, seconds in self.startup_timings.items()
+            )
         )
 
+    def load_data(self) -> None:
+        with self.startup_phase("pokedex"):
+            self.pokedex = Pokedex.open()
+        with self.startup_phase("matcher"):
+            self.matcher = NameMatcher.from_pokedex(
+                self.pokedex, max_distance=int(os.getenv("ANSWER_MAX_DISTANCE", 2))
+            )
+        with self.startup_phase("completions"):
+            self.completions = PrefixIndex.from_pokedex(self.pokedex)
+        with self.startup_phase("filters"):
+            self.filters = FilterIndex.from_pokedex(self.pokedex)
+
+    async def setup_cluster(self) -> None:
+        if self.cluster_id is None:
+            return
+        cluster = ClusterClient(
+            self,
+            self.cluster_id,
+            token=os.environ["CLUSTER_IPC_TOKEN"],
+            host=os.getenv("CLUSTER_IPC_HOST", "127.0.0.1"),
+            port=int(os.getenv("CLUSTER_IPC_PORT", 4840)),
+        )
+        # before the link is up, the rank index is built concurrently and
+        # records every guess mirrored until it is ready
+        self.gtp_db.join_cluster(cluster)
+        try:
+            await cluster.start()
+        except OSError as error:
+            # shared state degrades to per-process, the shards still run
+            print(f"Cluster {self.cluster_id}: IPC unavailable ({error!r})")
+            return
+        self.cluster = cluster
+
+    async def setup_database(self) -> None:
+        with self.startup_phase("database pool"):
+            self.db = await database_from_env()
+            self.db.listeners.append(self.metrics.on_query)
+        with self.startup_phase("migrations"):
+            await run_migrations(self.db)
+        if os.getenv("WRITE_BEHIND", "").lower() in ("1", "true", "yes"):
+            # coalesce game rewards in memory instead of committing per answer
+            self.reward_buffer = RewardBuffer(
+                self.db,
+                interval=float(os.getenv("WRITE_BEHIND_INTERVAL", 5)),
+                max_pending=int(os.getenv("WRITE_BEHIND_MAX_PENDING", 500)),
+            )
+            self.reward_buffer.start()
+        with self.startup_phase("repositories"):
+            await self.gtp_db.setup(self, self.reward_buffer)
+            await self.currency_db.setup(self, self.reward_buffer)
+            await self.stats_db.setup(self, self.reward_buffer)
+            await self.user_directory.setup(self)
+
+    async def close(self) -> None:
+        if self.cluster is not None:
+            await self.cluster.close()
+        if self.reward_buffer is not None:
+            await self.reward_buffer.close()
+        if hasattr(self, "db"):
+            await self.user_directory.close()
+        await super().close()
+        await self.metrics.close()
+        await self.watchdog.close()
+        self.timers.stop()
+        self.images.close()
+        if hasattr(self, "client_session"):
+            await self.client_session.close()
+        if hasattr(self, "db"):
+            await self.db.close()
+
     async def get_prefix(self, message: disnake.Message) -> list[str]:
         return commands.when_mentioned_or("p!")(self, message)
 
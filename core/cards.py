@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import functools
+import hashlib
+import io
+
+import disnake
+
+from .images import MemoryLRU, SpriteRenderer
+
+FONT_PATH = "data/profile_font.ttf"
+CARD_SIZE = (640, 220)
+AVATAR_SIZE = 160
+
+
+# everything below the cache runs inside the renderer's worker processes;
+# fonts and the background are built once per worker and reused
+@functools.lru_cache(maxsize=None)
+def _font(size: int):
+    from PIL import ImageFont
+
+    return ImageFont.truetype(FONT_PATH, size)
+
+
+@functools.lru_cache(maxsize=None)
+def _background():
+    from PIL import Image, ImageDraw
+
+    width, height = CARD_SIZE
+    background = Image.new("RGBA", CARD_SIZE)
+    draw = ImageDraw.Draw(background)
+    for y in range(height):
+        shade = int(30 + 40 * y / height)
+        draw.line([(0, y), (width, y)], fill=(shade, 24, shade + 30, 255))
+    panel = Image.new("RGBA", CARD_SIZE, (0, 0, 0, 0))
+    ImageDraw.Draw(panel).rounded_rectangle(
+        (200, 30, width - 24, height - 30), radius=18, fill=(255, 255, 255, 28)
+    )
+    background.alpha_composite(panel)
+    return background
+
+
+@functools.lru_cache(maxsize=None)
+def _avatar_mask():
+    from PIL import Image, ImageDraw
+
+    mask = Image.new("L", (AVATAR_SIZE, AVATAR_SIZE), 0)
+    ImageDraw.Draw(mask).ellipse((0, 0, AVATAR_SIZE, AVATAR_SIZE), fill=255)
+    return mask
+
+
+def render_profile_card(
+    name: str, avatar: bytes | None, coins: int, guesses: int
+) -> bytes:
+    from PIL import Image, ImageDraw
+
+    card = _background().copy()
+    if avatar:
+        picture = Image.open(io.BytesIO(avatar)).convert("RGBA")
+        picture = picture.resize((AVATAR_SIZE, AVATAR_SIZE))
+        card.paste(picture, (24, 30), _avatar_mask())
+    draw = ImageDraw.Draw(card)
+    draw.text((224, 44), name[:24], font=_font(34), fill=(255, 255, 255, 255))
+    draw.text(
+        (224, 104),
+        f"Balance: {coins:,} Pokédollars",
+        font=_font(24),
+        fill=(255, 221, 87, 255),
+    )
+    draw.text(
+        (224, 144),
+        f"Who's that Pokemon guesses: {guesses:,}",
+        font=_font(24),
+        fill=(190, 230, 255, 255),
+    )
+    output = io.BytesIO()
+    card.save(output, format="PNG", optimize=True)
+    return output.getvalue()
+
+
+class ProfileCards:
+    """Profile card images, cached by user and a hash of what the card shows."""
+
+    def __init__(
+        self, renderer: SpriteRenderer, max_bytes: int = 16 * 1024 * 1024
+    ) -> None:
+        self.renderer = renderer
+        self.cards = MemoryLRU(max_bytes)
+        self.avatars = MemoryLRU(max_bytes // 2)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(user: disnake.abc.User, coins: int, guesses: int) -> str:
+        shown = f"{user}|{user.display_avatar.key}|{coins}|{guesses}"
+        return f"{user.id}:{hashlib.sha1(shown.encode()).hexdigest()}"
+
+    async def avatar(self, user: disnake.abc.User) -> bytes | None:
+        asset = user.display_avatar.with_format("png").with_size(256)
+        data = self.avatars.get(asset.key)
+        if data is None:
+            try:
+                data = await asset.read()
+            except disnake.HTTPException:
+                return None
+            self.avatars.set(asset.key, data)
+        return data
+
+    async def render(self, user: disnake.abc.User, coins: int, guesses: int) -> bytes:
+        key = self.key(user, coins, guesses)
+        data = self.cards.get(key)
+        if data is not None:
+            self.hits += 1
+            return data
+        self.misses += 1
+        avatar = await self.avatar(user)
+        data = await self.renderer.run(
+            render_profile_card, str(user), avatar, coins, guesses
+        )
+        self.cards.set(key, data)
+        return data
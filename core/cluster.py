@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import inspect
+import itertools
+import json
+import time
+from typing import Any, Callable
+
+import disnake
+from disnake.ext import commands
+
+EventHandler = Callable[[dict], Any]
+
+
+class CooldownTable:
+    """Fixed-window rate limits keyed by arbitrary strings."""
+
+    def __init__(self) -> None:
+        self.windows: dict[str, tuple[float, int]] = {}
+
+    def hit(self, key: str, rate: int, per: float) -> float:
+        now = time.monotonic()
+        window_end, count = self.windows.get(key, (0.0, 0))
+        if now >= window_end:
+            window_end, count = now + per, 0
+        if count >= rate:
+            return window_end - now
+        self.windows[key] = (window_end, count + 1)
+        return 0.0
+
+    def prune(self) -> None:
+        now = time.monotonic()
+        for key in [k for k, (end, _) in self.windows.items() if end <= now]:
+            del self.windows[key]
+
+
+async def _send(writer: asyncio.StreamWriter, message: dict) -> None:
+    writer.write(json.dumps(message, separators=(",", ":")).encode() + b"\n")
+    await writer.drain()
+
+
+class ClusterServer:
+    """IPC hub run by the launcher; every worker process connects to it.
+
+    Workers exchange newline-delimited JSON over a localhost socket: events
+    are fanned out to every other worker, requests (cooldowns, cluster
+    stats) are answered from state held here so all processes agree.
+    """
+
+    def __init__(self, token: str, host: str = "127.0.0.1", port: int = 4840) -> None:
+        self.token = token
+        self.host = host
+        self.port = port
+        self.writers: dict[int, asyncio.StreamWriter] = {}
+        self.stats: dict[int, dict] = {}
+        self.cooldowns = CooldownTable()
+        self._server: asyncio.AbstractServer | None = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self.handle, self.host, self.port)
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        cluster_id = None
+        try:
+            hello = json.loads(await reader.readline() or "{}")
+            if hello.get("op") != "hello" or hello.get("token") != self.token:
+                return
+            cluster_id = hello["cluster"]
+            self.writers[cluster_id] = writer
+            while line := await reader.readline():
+                await self.dispatch(cluster_id, json.loads(line))
+        except (ConnectionError, json.JSONDecodeError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            if cluster_id is not None and self.writers.get(cluster_id) is writer:
+                del self.writers[cluster_id]
+                self.stats.pop(cluster_id, None)
+            writer.close()
+
+    async def dispatch(self, cluster_id: int, message: dict) -> None:
+        op = message.get("op")
+        if op == "broadcast":
+            event = {**message, "op": "event", "origin": cluster_id}
+            for other, writer in list(self.writers.items()):
+                if other != cluster_id:
+                    with contextlib.suppress(ConnectionError):
+                        await _send(writer, event)
+        elif op == "stats":
+            self.stats[cluster_id] = message["data"]
+        elif op == "request":
+            result = self.answer(message["method"], message.get("args", {}))
+            await _send(
+                self.writers[cluster_id],
+                {"op": "reply", "id": message["id"], "result": result},
+            )
+
+    def answer(self, method: str, args: dict) -> Any:
+        if method == "cooldown":
+            self.cooldowns.prune()
+            return self.cooldowns.hit(args["key"], args["rate"], args["per"])
+        if method == "stats":
+            return {str(cluster): stats for cluster, stats in self.stats.items()}
+        return None
+
+
+class ClusterClient:
+    """A worker's connection to the launcher's :class:`ClusterServer`."""
+
+    def __init__(
+        self, bot: commands.Bot, cluster_id: int, token: str, host: str, port: int
+    ) -> None:
+        self.bot = bot
+        self.cluster_id = cluster_id
+        self.token = token
+        self.host = host
+        self.port = port
+        self.handlers: dict[str, list[EventHandler]] = {}
+        self.replies: dict[int, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+        self._writer: asyncio.StreamWriter | None = None
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    def subscribe(self, event: str, handler: EventHandler) -> None:
+        self.handlers.setdefault(event, []).append(handler)
+
+    async def start(self) -> None:
+        await self.connect()
+        self._tasks = [
+            asyncio.create_task(self._read_forever()),
+            asyncio.create_task(self._report_forever()),
+        ]
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        if self._writer is not None:
+            self._writer.close()
+
+    async def connect(self) -> None:
+        reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        self._reader = reader
+        await _send(
+            self._writer,
+            {"op": "hello", "cluster": self.cluster_id, "token": self.token},
+        )
+
+    async def _read_forever(self) -> None:
+        delay = 1
+        while True:
+            try:
+                while line := await self._reader.readline():
+                    self._handle(json.loads(line))
+            except (ConnectionError, json.JSONDecodeError):
+                pass
+            for future in self.replies.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Cluster IPC disconnected."))
+            self.replies.clear()
+            self._writer = None
+            # keep trying; the launcher may be restarting its side
+            while not self.connected:
+                await asyncio.sleep(delay)
+                try:
+                    await self.connect()
+                    delay = 1
+                except OSError:
+                    delay = min(delay * 2, 30)
+            # events sent while the link was down are gone, let state resync
+            self._handle({"op": "event", "event": "reconnect", "data": {}})
+
+    def _handle(self, message: dict) -> None:
+        op = message.get("op")
+        if op == "reply":
+            future = self.replies.pop(message["id"], None)
+            if future is not None and not future.done():
+                future.set_result(message.get("result"))
+        elif op == "event":
+            for handler in self.handlers.get(message["event"], ()):
+                try:
+                    result = handler(message.get("data", {}))
+                    if inspect.isawaitable(result):
+                        asyncio.ensure_future(result)
+                except Exception as error:
+                    print(f"Cluster event handler failed: {error!r}")
+
+    async def _report_forever(self) -> None:
+        while True:
+            with contextlib.suppress(ConnectionError, AttributeError):
+                await self.report()
+            await asyncio.sleep(15)
+
+    async def report(self) -> None:
+        if not self.connected:
+            return
+        await _send(
+            self._writer,
+            {
+                "op": "stats",
+                "data": {
+                    "guilds": len(self.bot.guilds),
+                    "users": len(self.bot.users),
+                    "shards": list(self.bot.shards)
+                    if hasattr(self.bot, "shards")
+                    else [],
+                    "latency": self.bot.latency,
+                },
+            },
+        )
+
+    async def broadcast(self, event: str, data: dict) -> None:
+        if self.connected:
+            with contextlib.suppress(ConnectionError):
+                await _send(
+                    self._writer, {"op": "broadcast", "event": event, "data": data}
+                )
+
+    def publish(self, event: str, data: dict) -> None:
+        """Fire-and-forget :meth:`broadcast` for synchronous callers."""
+        if self.connected:
+            asyncio.ensure_future(self.broadcast(event, data))
+
+    async def request(self, method: str, timeout: float = 5, **args: Any) -> Any:
+        if not self.connected:
+            raise ConnectionError("Cluster IPC is not connected.")
+        request_id = next(self._ids)
+        future = self.replies[request_id] = asyncio.get_running_loop().create_future()
+        await _send(
+            self._writer,
+            {"op": "request", "id": request_id, "method": method, "args": args},
+        )
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self.replies.pop(request_id, None)
+
+
+_local_cooldowns = CooldownTable()
+
+
+def shared_cooldown(rate: int, per: float):
+    """Per-user cooldown that holds across every process of a cluster.
+
+    Falls back to a process-local table when the bot runs on its own or the
+    launcher's IPC hub is unreachable.
+    """
+
+    cooldown = commands.Cooldown(rate, per)
+
+    async def predicate(inter: disnake.ApplicationCommandInteraction) -> bool:
+        key = f"{inter.application_command.qualified_name}:{inter.author.id}"
+        cluster: ClusterClient | None = getattr(inter.bot, "cluster", None)
+        retry_after = None
+        if cluster is not None and cluster.connected:
+            with contextlib.suppress(ConnectionError, asyncio.TimeoutError):
+                retry_after = await cluster.request(
+                    "cooldown", key=key, rate=rate, per=per
+                )
+        if retry_after is None:
+            _local_cooldowns.prune()
+            retry_after = _local_cooldowns.hit(key, rate, per)
+        if retry_after:
+            raise commands.CommandOnCooldown(
+                cooldown, retry_after, commands.BucketType.user
+            )
+        return True
+
+    return commands.check(predicate)
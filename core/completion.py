@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import bisect
+import heapq
+from collections import Counter
+from typing import Iterable
+
+from .pokedex import Pokedex, normalize
+
+
+class PrefixIndex:
+    """Sorted-array prefix index for autocomplete.
+
+    Every word start of every label is a key, so "mega" finds
+    "Charizard Mega X" as well as names that begin with it. A prefix is two
+    binary searches; only the matching slice is ranked.
+    """
+
+    def __init__(self, entries: Iterable[tuple[str, int]]) -> None:
+        self.labels: list[str] = []
+        self.priors: list[int] = []
+        self.normalized: list[str] = []
+        rows: list[tuple[str, int]] = []
+        for label, prior in entries:
+            position = len(self.labels)
+            key = normalize(label)
+            self.labels.append(label)
+            self.priors.append(prior)
+            self.normalized.append(key)
+            words = key.split(" ")
+            for start in range(len(words)):
+                rows.append((" ".join(words[start:]), position))
+        rows.sort()
+        self.positions = {key: i for i, key in enumerate(self.normalized)}
+        self.keys = [key for key, _ in rows]
+        self.owners = [position for _, position in rows]
+        self._default = self._rank(range(len(self.labels)), Counter(), 25)
+
+    @classmethod
+    def from_pokedex(cls, pokedex: Pokedex) -> PrefixIndex:
+        entries: dict[str, tuple[str, int]] = {}
+        for record in pokedex:
+            entries[normalize(record.name)] = (record.display_name, 2)
+        for form in pokedex.forms:
+            key = normalize(form.name)
+            if key not in entries:
+                entries[key] = (form.name.title(), 1 if form.base else 0)
+        return cls(entries.values())
+
+    def _rank(
+        self, positions: Iterable[int], popularity: Counter[str], limit: int
+    ) -> list[int]:
+        return heapq.nsmallest(
+            limit,
+            set(positions),
+            key=lambda i: (
+                -popularity.get(self.normalized[i], 0),
+                -self.priors[i],
+                self.labels[i],
+            ),
+        )
+
+    def complete(
+        self, text: str, popularity: Counter[str] | None = None, limit: int = 25
+    ) -> list[str]:
+        prefix = normalize(text)
+        if not prefix:
+            candidates = self._default
+            if popularity:
+                # the most looked-up names, topped up with the unranked default
+                candidates = [
+                    self.positions[key]
+                    for key, _ in popularity.most_common(limit)
+                    if key in self.positions
+                ] + self._default
+        else:
+            start = bisect.bisect_left(self.keys, prefix)
+            end = bisect.bisect_left(self.keys, prefix + "\uffff", start)
+            candidates = self.owners[start:end]
+        ranked = self._rank(candidates, popularity or Counter(), limit)
+        return [self.labels[i] for i in ranked]
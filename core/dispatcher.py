@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Callable
+
+import disnake
+from disnake.ext import commands
+
+from .timers import TimerWheel
+
+AnswerCheck = Callable[[disnake.Message], bool]
+
+
+class PendingAnswer:
+    __slots__ = ("check", "future")
+
+    def __init__(self, check: AnswerCheck, future: asyncio.Future) -> None:
+        self.check = check
+        self.future = future
+
+
+class AnswerDispatcher:
+    """Routes chat messages to the guessing-game round waiting on them.
+
+    One ``on_message`` listener serves every running round: rounds are keyed
+    by ``(channel_id, user_id)``, so a message costs a single dict lookup
+    instead of running one ``wait_for`` predicate per active game.
+    """
+
+    def __init__(self, bot: commands.Bot, timers: TimerWheel) -> None:
+        self.bot = bot
+        self.timers = timers
+        self.rounds: dict[tuple[int, int], list[PendingAnswer]] = {}
+        self.dropped = 0
+        bot.add_listener(self.on_message)
+
+    def __len__(self) -> int:
+        return sum(len(pending) for pending in self.rounds.values())
+
+    def register(
+        self,
+        channel_id: int,
+        user_id: int,
+        check: AnswerCheck,
+        future: asyncio.Future | None = None,
+    ) -> PendingAnswer:
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+        pending = PendingAnswer(check, future)
+        self.rounds.setdefault((channel_id, user_id), []).append(pending)
+        return pending
+
+    def discard(self, channel_id: int, user_id: int, pending: PendingAnswer) -> None:
+        key = (channel_id, user_id)
+        waiting = self.rounds.get(key)
+        if waiting is None:
+            return
+        try:
+            waiting.remove(pending)
+        except ValueError:
+            pass
+        if not waiting:
+            del self.rounds[key]
+        if not pending.future.done():
+            pending.future.cancel()
+
+    async def wait_for_answer(
+        self, channel_id: int, user_id: int, check: AnswerCheck, timeout: float
+    ) -> disnake.Message:
+        pending = self.register(channel_id, user_id, check)
+        timer = self.timers.schedule(timeout, lambda: expire(pending.future))
+        try:
+            return await pending.future
+        finally:
+            timer.cancel()
+            self.discard(channel_id, user_id, pending)
+
+    def drop_idle_messages(self, prefixes: tuple[str, ...]) -> None:
+        """Skip building messages that no round and no command will read.
+
+        Checked on the raw gateway payload, so disnake never creates the
+        message, its author or its member for the chatter around the bot.
+        """
+        parsers = self.bot._connection.parsers
+        parse = parsers["MESSAGE_CREATE"]
+
+        def parse_message_create(data: dict) -> None:
+            key = (int(data["channel_id"]), int(data["author"]["id"]))
+            content = data.get("content", "")
+            if key in self.rounds or content.startswith(prefixes):
+                return parse(data)
+            user = self.bot.user
+            # mentioning the bot is a command prefix as well
+            if user is not None and content.startswith(
+                (f"<@{user.id}>", f"<@!{user.id}>")
+            ):
+                return parse(data)
+            self.dropped += 1
+
+        parsers["MESSAGE_CREATE"] = parse_message_create
+
+    async def on_message(self, message: disnake.Message) -> None:
+        waiting = self.rounds.get((message.channel.id, message.author.id))
+        if not waiting:
+            return
+        for pending in waiting:
+            if not pending.future.done() and pending.check(message):
+                pending.future.set_result(message)
+                return
+
+
+def expire(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_exception(asyncio.TimeoutError())
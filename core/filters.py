@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import shlex
+from typing import Iterable, Iterator
+
+from .pokedex import Pokedex, PokemonRecord, normalize
+
+# query field -> record attribute
+FIELDS = {
+    "type": "types",
+    "ability": "abilities",
+    "egg": "egg_groups",
+    "species": "species",
+    "gen": "generation",
+}
+ALIASES = {
+    "types": "type",
+    "abilities": "ability",
+    "eggs": "egg",
+    "egg group": "egg",
+    "egggroup": "egg",
+    "generation": "gen",
+}
+
+
+class FilterError(ValueError):
+    pass
+
+
+def bits_set(bits: int) -> Iterator[int]:
+    """Positions of the set bits, lowest first."""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+class FilterIndex:
+    """One bitset per value of every searchable field.
+
+    Bit ``i`` stands for the pokedex record at position ``i``, so a query
+    is evaluated with ``&``, ``|`` and ``~`` over a handful of integers and
+    the result pages straight out of the set bits.
+
+    Queries are terms separated by spaces, which must all match:
+    ``type:grass type:poison ability:chlorophyll egg:monster``. Commas
+    accept any of several values (``type:fire,water``), a leading ``-``
+    excludes (``-type:flying``) and ``or`` separates alternative groups.
+    A term without a field matches that value in any field.
+    """
+
+    def __init__(self, records: Iterable[PokemonRecord]) -> None:
+        self.columns: dict[str, dict[str, int]] = {field: {} for field in FIELDS}
+        self.size = 0
+        for position, record in enumerate(records):
+            bit = 1 << position
+            for field, attribute in FIELDS.items():
+                values = getattr(record, attribute)
+                if not isinstance(values, tuple):
+                    values = (str(values),)
+                column = self.columns[field]
+                for value in values:
+                    key = normalize(value)
+                    column[key] = column.get(key, 0) | bit
+            self.size = position + 1
+        self.all = (1 << self.size) - 1
+
+    @classmethod
+    def from_pokedex(cls, pokedex: Pokedex) -> FilterIndex:
+        return cls(pokedex)
+
+    def values(self, field: str) -> list[str]:
+        return sorted(self.columns[field])
+
+    def term(self, text: str) -> int:
+        field, separator, value = text.rpartition(":")
+        field = normalize(field)
+        field = ALIASES.get(field, field)
+        if separator and field not in FIELDS:
+            raise FilterError(
+                f"Unknown filter `{field}`, use one of {', '.join(FIELDS)}."
+            )
+        options = [option for option in value.split(",") if normalize(option)]
+        if not options:
+            raise FilterError(f"`{text}` has no value to filter by.")
+        bits = 0
+        for option in options:
+            key = normalize(option)
+            columns = [field] if separator else FIELDS
+            matches = [self.columns[column].get(key) for column in columns]
+            if not any(matches):
+                raise FilterError(
+                    f"No {field if separator else 'filter'} called `{option}`."
+                )
+            for match in matches:
+                bits |= match or 0
+        return bits
+
+    def evaluate(self, query: str) -> int:
+        """The bitset of records matching ``query``."""
+        try:
+            words = shlex.split(query)
+        except ValueError as error:
+            raise FilterError(f"Could not read the query: {error}.") from None
+        if not words:
+            raise FilterError("The query is empty.")
+        result, group, terms = 0, self.all, 0
+        for word in words:
+            if word.lower() in ("or", "|"):
+                if not terms:
+                    # an empty group would otherwise match every pokemon
+                    raise FilterError(f"`{word}` needs filters on both sides.")
+                result |= group
+                group, terms = self.all, 0
+                continue
+            if word.startswith("-") and len(word) > 1:
+                group &= ~self.term(word[1:])
+            else:
+                group &= self.term(word)
+            terms += 1
+        if not terms:
+            raise FilterError(f"`{words[-1]}` needs filters on both sides.")
+        return (result | group) & self.all
+
+    @staticmethod
+    def count(bits: int) -> int:
+        return bin(bits).count("1")
+
+    @staticmethod
+    def page(bits: int, page: int, per_page: int) -> list[int]:
+        """Record positions on ``page`` of a result, in pokedex order."""
+        positions = bits_set(bits)
+        for _ in range(page * per_page):
+            if next(positions, None) is None:
+                return []
+        return [position for _, position in zip(range(per_page), positions)]
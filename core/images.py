@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import hashlib
+import io
+import os
+import random
+import threading
+from collections import OrderedDict
+from typing import Iterable
+
+import disnake
+from disnake.ext import commands
+
+RESOURCES_URL = "https://raw.githubusercontent.com/PokeMare/resources/main"
+SILHOUETTE_COLORS = ((0, 0, 0), (24, 24, 64), (40, 8, 48), (8, 40, 32))
+
+
+class Variant:
+    __slots__ = ("flip", "color")
+
+    def __init__(
+        self, flip: bool = False, color: tuple[int, int, int] = (0, 0, 0)
+    ) -> None:
+        self.flip = flip
+        self.color = color
+
+    @classmethod
+    def random(cls) -> Variant:
+        return cls(random.random() < 0.5, random.choice(SILHOUETTE_COLORS))
+
+    @property
+    def key(self) -> str:
+        return f"{'f' if self.flip else 'n'}{''.join(f'{c:02x}' for c in self.color)}"
+
+
+# rendering runs in worker processes, so these stay plain module-level functions
+def _open(source: bytes, flip: bool):
+    from PIL import Image, ImageOps
+
+    image = Image.open(io.BytesIO(source)).convert("RGBA")
+    return ImageOps.mirror(image) if flip else image
+
+
+def _encode(image) -> bytes:
+    output = io.BytesIO()
+    image.save(output, format="PNG", optimize=True)
+    return output.getvalue()
+
+
+def render_silhouette(source: bytes, flip: bool, color: tuple[int, int, int]) -> bytes:
+    from PIL import Image
+
+    image = _open(source, flip)
+    silhouette = Image.new("RGBA", image.size, (*color, 255))
+    silhouette.putalpha(image.getchannel("A"))
+    return _encode(silhouette)
+
+
+def render_reveal(source: bytes, flip: bool) -> bytes:
+    return _encode(_open(source, flip))
+
+
+class MemoryLRU:
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._data: OrderedDict[str, bytes] = OrderedDict()
+
+    def get(self, key: str) -> bytes | None:
+        data = self._data.get(key)
+        if data is not None:
+            self._data.move_to_end(key)
+        return data
+
+    def set(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        old = self._data.pop(key, None)
+        self.size += len(data) - (len(old) if old else 0)
+        self._data[key] = data
+        while self.size > self.max_bytes:
+            _, evicted = self._data.popitem(last=False)
+            self.size -= len(evicted)
+
+
+class DiskLRU:
+    def __init__(self, directory: str, max_bytes: int) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._files: OrderedDict[str, int] | None = None
+        # reads and writes happen on executor threads
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(
+            self.directory, hashlib.sha1(key.encode()).hexdigest() + ".png"
+        )
+
+    def _index(self) -> OrderedDict[str, int]:
+        if self._files is None:
+            os.makedirs(self.directory, exist_ok=True)
+            entries = sorted(
+                (entry for entry in os.scandir(self.directory) if entry.is_file()),
+                key=lambda entry: entry.stat().st_mtime,
+            )
+            self._files = OrderedDict((e.path, e.stat().st_size) for e in entries)
+            self.size = sum(self._files.values())
+        return self._files
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            return self._get(key)
+
+    def set(self, key: str, data: bytes) -> None:
+        with self._lock:
+            self._set(key, data)
+
+    def _get(self, key: str) -> bytes | None:
+        path = self._path(key)
+        files = self._index()
+        if path not in files:
+            return None
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+        except OSError:
+            self.size -= files.pop(path)
+            return None
+        files.move_to_end(path)
+        os.utime(path)
+        return data
+
+    def _set(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        files = self._index()
+        with open(path, "wb") as file:
+            file.write(data)
+        self.size += len(data) - files.pop(path, 0)
+        files[path] = len(data)
+        while self.size > self.max_bytes and len(files) > 1:
+            evicted, size = files.popitem(last=False)
+            self.size -= size
+            try:
+                os.remove(evicted)
+            except OSError:
+                pass
+
+
+class SpriteRenderer:
+    """Renders guessing-game images locally and keeps the encoded PNGs.
+
+    Source sprites are downloaded once into ``trash/sprites``; silhouettes
+    and reveals are rendered with Pillow in a process pool and cached in a
+    size-bounded LRU in memory and on disk.
+    """
+
+    def __init__(self, bot: commands.Bot) -> None:
+        self.bot = bot
+        self.workers = int(os.getenv("IMAGE_WORKERS", 2))
+        self.memory = MemoryLRU(int(os.getenv("IMAGE_CACHE_MB", 32)) * 1024 * 1024)
+        self.disk = DiskLRU(
+            "trash/renders", int(os.getenv("IMAGE_DISK_CACHE_MB", 256)) * 1024 * 1024
+        )
+        self.sprite_directory = "trash/sprites"
+        self._executor: concurrent.futures.ProcessPoolExecutor | None = None
+        self._renders: dict[str, asyncio.Future] = {}
+
+    @property
+    def executor(self) -> concurrent.futures.ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = concurrent.futures.ProcessPoolExecutor(self.workers)
+        return self._executor
+
+    async def run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, function, *args
+        )
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def source(self, sprite: str) -> bytes:
+        path = os.path.join(self.sprite_directory, sprite)
+        loop = asyncio.get_running_loop()
+        if os.path.exists(path):
+            return await loop.run_in_executor(None, _read, path)
+        async with self.bot.client_session.get(f"{RESOURCES_URL}/{sprite}") as response:
+            response.raise_for_status()
+            data = await response.read()
+        await loop.run_in_executor(None, _write, path, data)
+        return data
+
+    async def _render(self, key: str, function, sprite: str, *args) -> bytes:
+        data = self.memory.get(key)
+        if data is not None:
+            return data
+        # concurrent requests for the same image share one render
+        if key in self._renders:
+            return await asyncio.shield(self._renders[key])
+        future = self._renders[key] = asyncio.get_running_loop().create_future()
+        try:
+            loop = asyncio.get_running_loop()
+            data = await loop.run_in_executor(None, self.disk.get, key)
+            if data is None:
+                source = await self.source(sprite)
+                data = await loop.run_in_executor(
+                    self.executor, function, source, *args
+                )
+                await loop.run_in_executor(None, self.disk.set, key, data)
+            self.memory.set(key, data)
+            future.set_result(data)
+            return data
+        except BaseException as error:
+            future.set_exception(error)
+            future.exception()  # mark retrieved when nobody else is waiting
+            raise
+        finally:
+            del self._renders[key]
+
+    async def silhouette(self, sprite: str, variant: Variant) -> bytes:
+        return await self._render(
+            f"silhouette/{variant.key}/{sprite}",
+            render_silhouette,
+            sprite,
+            variant.flip,
+            variant.color,
+        )
+
+    async def reveal(self, sprite: str, variant: Variant) -> bytes:
+        return await self._render(
+            f"reveal/{'f' if variant.flip else 'n'}/{sprite}",
+            render_reveal,
+            sprite,
+            variant.flip,
+        )
+
+    async def prewarm(self, sprites: Iterable[str], concurrency: int = 8) -> int:
+        semaphore = asyncio.Semaphore(concurrency)
+        variants = [
+            Variant(flip, color)
+            for flip in (False, True)
+            for color in SILHOUETTE_COLORS
+        ]
+
+        async def warm(sprite: str) -> int:
+            async with semaphore:
+                for variant in variants:
+                    await self.silhouette(sprite, variant)
+                for flip in (False, True):
+                    await self.reveal(sprite, Variant(flip))
+                return 1
+
+        results = await asyncio.gather(*map(warm, sprites), return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                print(f"Failed to prewarm a sprite: {result!r}")
+        return sum(1 for result in results if result == 1)
+
+
+def _read(path: str) -> bytes:
+    with open(path, "rb") as file:
+        return file.read()
+
+
+def _write(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as file:
+        file.write(data)
+
+
+def as_file(data: bytes, filename: str) -> disnake.File:
+    return disnake.File(io.BytesIO(data), filename=filename)
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import json
+import random
+import re
+from collections import Counter
+
+from .pokedex import normalize
+
+_WORD = re.compile(r"[a-z0-9]+")
+NGRAM = 3
+
+
+def tokens(text: str) -> list[str]:
+    return _WORD.findall(normalize(text))
+
+
+def ngrams(words: list[str], n: int = NGRAM) -> list[tuple[str, ...]]:
+    if len(words) < n:
+        return [tuple(words)] if words else []
+    return [tuple(words[i : i + n]) for i in range(len(words) - n + 1)]
+
+
+class Song:
+    __slots__ = ("id", "title", "artist", "album", "image", "link", "lines")
+
+    def __init__(self, data: dict) -> None:
+        self.id: int = data["id"]
+        self.title: str = data["title"]
+        self.artist: str = data.get("artist", "")
+        self.album: str = data.get("album", "")
+        self.image: str | None = data.get("image")
+        self.link: str | None = data.get("link")
+        self.lines: tuple[str, ...] = tuple(
+            line.strip() for line in data["lyrics"].splitlines()
+        )
+
+
+class LyricsIndex:
+    """Titles and lyric lines of ``data/songs.json`` behind inverted indexes.
+
+    Titles are looked up by their normalized text; lyric guesses are split
+    into word trigrams and each trigram maps straight to the ``(song, line)``
+    pairs that contain it, so matching a guess is a handful of dict lookups.
+    """
+
+    def __init__(self, songs: list[dict], min_overlap: float = 0.6) -> None:
+        self.min_overlap = min_overlap
+        self.songs: dict[int, Song] = {}
+        self.titles: dict[str, int] = {}
+        self.grams: dict[tuple[str, ...], list[tuple[int, int]]] = {}
+        for data in songs:
+            song = self.songs[data["id"]] = Song(data)
+            for title in (song.title, *data.get("alternative_titles", ())):
+                self.titles.setdefault(" ".join(tokens(title)), song.id)
+            for number, line in enumerate(song.lines):
+                for gram in set(ngrams(tokens(line))):
+                    self.grams.setdefault(gram, []).append((song.id, number))
+
+    @classmethod
+    def from_file(cls, path: str = "data/songs.json") -> LyricsIndex:
+        with open(path, "r", encoding="utf-8") as file:
+            return cls(json.load(file)["songs"])
+
+    def snippet(self, length: int = 2) -> tuple[Song, list[int]]:
+        """A random song and the numbers of the lyric lines to show from it."""
+        song = random.choice(list(self.songs.values()))
+        lyric_lines = [i for i, line in enumerate(song.lines) if line]
+        # leave at least one lyric line after the snippet to be guessed
+        start = random.randrange(max(len(lyric_lines) - length, 1))
+        return song, lyric_lines[start : start + length]
+
+    def title_match(self, guess: str) -> int | None:
+        return self.titles.get(" ".join(tokens(guess)))
+
+    def matches(self, guess: str, song: Song, after_line: int) -> bool:
+        """Whether ``guess`` names ``song`` or quotes a line after ``after_line``.
+
+        The quoted line has to fit the guess better than every line up to
+        ``after_line`` does, so pasting back the snippet never counts as a
+        later copy of it, such as the same chorus line.
+        """
+        words = tokens(guess)
+        if self.titles.get(" ".join(words)) == song.id:
+            return True
+        if len(words) < NGRAM:
+            return False
+        grams = set(ngrams(words))
+        hits: Counter[int] = Counter()
+        for gram in grams:
+            for song_id, line in self.grams.get(gram, ()):
+                if song_id == song.id:
+                    hits[line] += 1
+        shown = max((n for line, n in hits.items() if line <= after_line), default=0)
+        best = max((n for line, n in hits.items() if line > after_line), default=0)
+        return best > shown and best >= self.min_overlap * len(grams)
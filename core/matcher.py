@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+from itertools import combinations
+from typing import Iterable
+
+from .pokedex import Pokedex, normalize
+
+# words naming a form of a species rather than a species of its own; words
+# like "z" (porygon z) or "ice" are left out on purpose
+FORM_WORDS = frozenset(
+    ("mega", "gmax", "alola", "galar", "hisui", "paldea", "primal", "totem")
+)
+# mega evolutions that come in two, "charizard mega x"
+MEGA_VARIANTS = frozenset(("x", "y"))
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance, giving up once it exceeds ``limit``."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2: list[int] = []
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i] + [0] * len(b)
+        for j, char_b in enumerate(b, start=1):
+            cost = char_a != char_b
+            current[j] = min(
+                previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost
+            )
+            if i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def deletes(key: str, distance: int) -> set[str]:
+    variants = {key}
+    frontier = {key}
+    for _ in range(distance):
+        frontier = {
+            variant[:i] + variant[i + 1 :]
+            for variant in frontier
+            for i in range(len(variant))
+        }
+        variants |= frontier
+    return variants
+
+
+class NameMatcher:
+    """Typo-tolerant lookup from a free-text answer to a Pokemon.
+
+    Every known name is reduced to a compact key (accents, punctuation and
+    spaces dropped) and grouped under its base species, so "abomasnow mega"
+    and "Mega Abomasnow" both count as "abomasnow". Fuzzy matches use a
+    symmetric-delete index: all deletions of every key within
+    ``max_distance`` are precomputed, so a query only generates its own
+    deletions and checks the few names they point at.
+    """
+
+    def __init__(self, names: Iterable[str], max_distance: int = 2) -> None:
+        self.max_distance = max_distance
+        tokenised = {tuple(normalize(name).split()) for name in names}
+        tokenised.discard(())
+        self.bases = {"".join(tokens) for tokens in tokenised}
+        self.groups: dict[str, str] = {}
+        for tokens in tokenised:
+            self.groups["".join(tokens)] = self.base_key(tokens)
+        self.longest = max((len(key) for key in self.groups), default=0)
+        self.index: dict[str, set[str]] = {}
+        for key in self.groups:
+            for variant in deletes(key, max_distance):
+                self.index.setdefault(variant, set()).add(key)
+
+    @classmethod
+    def from_pokedex(cls, pokedex: Pokedex, max_distance: int = 2) -> NameMatcher:
+        names = [record.name for record in pokedex]
+        names.extend(form.name for form in pokedex.forms)
+        return cls(names, max_distance)
+
+    def base_key(self, tokens: tuple[str, ...]) -> str:
+        mega = "mega" in tokens
+        stripped = "".join(
+            token
+            for token in tokens
+            if token not in FORM_WORDS and not (mega and token in MEGA_VARIANTS)
+        )
+        return stripped if stripped in self.bases else "".join(tokens)
+
+    def key(self, text: str) -> str:
+        return self.base_key(tuple(normalize(text).split()))
+
+    def budget(self, key: str) -> int:
+        if len(key) <= 3:
+            return 0
+        if len(key) <= 5:
+            return min(1, self.max_distance)
+        return self.max_distance
+
+    def resolve(self, text: str) -> set[str]:
+        """Base species keys closest to ``text``, empty if nothing is close enough."""
+        tokens = tuple(normalize(text).split())
+        full = "".join(tokens)
+        for candidate in (full, self.base_key(tokens)):
+            if candidate in self.groups:
+                return {self.groups[candidate]}
+        # deletes() grows with the text: chat longer than any name plus the
+        # typo budget can never be close enough, so skip the work
+        if len(full) > self.longest + self.max_distance:
+            return set()
+        limit = self.budget(full)
+        candidates: set[str] = set()
+        for variant in deletes(full, limit):
+            candidates.update(self.index.get(variant, ()))
+        best = limit + 1
+        found: set[str] = set()
+        for key in candidates:
+            distance = edit_distance(full, key, limit)
+            if distance < best:
+                best, found = distance, {self.groups[key]}
+            elif distance == best and distance <= limit:
+                found.add(self.groups[key])
+        return found
+
+    def matches(self, answer: str, target: str) -> bool:
+        return self.key(target) in self.resolve(answer)
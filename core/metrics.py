@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import bisect
+import time
+from collections import Counter
+from typing import Iterator
+
+import disnake
+from aiohttp import web
+from disnake.ext import commands
+
+from database.access import QueryTiming
+from database.cache import TTLCache
+
+COMMAND_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0, 5.0)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimate like Prometheus' ``histogram_quantile``: linear within a bucket."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if seen + count >= target and count:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (target - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def exposition(self, name: str, labels: str = "") -> Iterator[str]:
+        prefix = labels + "," if labels else ""
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}'
+        yield f'{name}_bucket{{{prefix}le="+Inf"}} {self.count}'
+        suffix = f"{{{labels}}}" if labels else ""
+        yield f"{name}_sum{suffix} {self.sum}"
+        yield f"{name}_count{suffix} {self.count}"
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+class Metrics:
+    """Command, database and gateway metrics in Prometheus text format.
+
+    Slash command latency runs from the interaction event to completion or
+    error. Database timings come from :attr:`Database.listeners`; gauges are
+    read from the bot whenever the metrics are rendered.
+    """
+
+    def __init__(self, bot: commands.Bot) -> None:
+        self.bot = bot
+        self.commands: dict[str, Histogram] = {}
+        self.errors: Counter[tuple[str, str]] = Counter()
+        self.queries: dict[str, Histogram] = {}
+        self.pool_wait = Histogram(QUERY_BUCKETS)
+        self._started: TTLCache[int, float] = TTLCache(maxsize=10_000, ttl=900)
+        self._runner: web.AppRunner | None = None
+        bot.add_listener(self.on_application_command)
+        bot.add_listener(self.on_slash_command_completion)
+        bot.add_listener(self.on_slash_command_error)
+
+    async def on_application_command(
+        self, inter: disnake.ApplicationCommandInteraction
+    ) -> None:
+        self._started.set(inter.id, time.perf_counter())
+
+    def _finish(self, inter: disnake.ApplicationCommandInteraction) -> str:
+        name = inter.application_command.qualified_name
+        started = self._started.pop(inter.id)
+        if started is not None:
+            histogram = self.commands.get(name)
+            if histogram is None:
+                histogram = self.commands[name] = Histogram(COMMAND_BUCKETS)
+            histogram.observe(time.perf_counter() - started)
+        return name
+
+    async def on_slash_command_completion(
+        self, inter: disnake.ApplicationCommandInteraction
+    ) -> None:
+        self._finish(inter)
+
+    async def on_slash_command_error(
+        self, inter: disnake.ApplicationCommandInteraction, error: Exception
+    ) -> None:
+        name = self._finish(inter)
+        original = getattr(error, "original", error)
+        self.errors[name, type(original).__name__] += 1
+
+    def on_query(self, timing: QueryTiming) -> None:
+        verb = timing.sql.split(" ", 1)[0].upper()
+        histogram = self.queries.get(verb)
+        if histogram is None:
+            histogram = self.queries[verb] = Histogram(QUERY_BUCKETS)
+        histogram.observe(timing.execution)
+        if timing.pool_wait:
+            self.pool_wait.observe(timing.pool_wait)
+
+    def gauges(self) -> dict[str, float]:
+        bot = self.bot
+        games = bot.get_cog("Games")
+        gauges = {
+            "pokemare_guilds": len(bot.guilds),
+            "pokemare_active_rounds": len(games.engine) if games else 0,
+            "pokemare_pending_timers": bot.timers.pending,
+            "pokemare_messages_dropped": bot.answers.dropped,
+            "pokemare_loop_stalls": bot.watchdog.stalls,
+            "pokemare_loop_slow_callbacks": bot.watchdog.slow_callbacks,
+        }
+        stats_cache = getattr(bot.stats_db, "cache", None)
+        if stats_cache is not None:
+            gauges["pokemare_stats_cache_hits"] = stats_cache.hits
+            gauges["pokemare_stats_cache_misses"] = stats_cache.misses
+            gauges["pokemare_stats_cache_entries"] = len(stats_cache)
+        db = getattr(bot, "db", None)
+        if db is not None:
+            gauges["pokemare_db_pool_size"] = db.pool.size
+            gauges["pokemare_db_pool_free"] = db.pool.freesize
+        return gauges
+
+    def render(self) -> str:
+        lines = ["# TYPE pokemare_command_seconds histogram"]
+        for name, histogram in self.commands.items():
+            lines.extend(
+                histogram.exposition(
+                    "pokemare_command_seconds", f'command="{_label(name)}"'
+                )
+            )
+        lines.append("# TYPE pokemare_command_errors_total counter")
+        for (name, error), count in self.errors.items():
+            lines.append(
+                f'pokemare_command_errors_total{{command="{_label(name)}",'
+                f'error="{error}"}} {count}'
+            )
+        lines.append("# TYPE pokemare_db_query_seconds histogram")
+        for verb, histogram in self.queries.items():
+            lines.extend(
+                histogram.exposition("pokemare_db_query_seconds", f'verb="{verb}"')
+            )
+        lines.append("# TYPE pokemare_db_pool_wait_seconds histogram")
+        lines.extend(self.pool_wait.exposition("pokemare_db_pool_wait_seconds"))
+        lines.append("# TYPE pokemare_loop_lag_seconds histogram")
+        lines.extend(self.bot.watchdog.lag.exposition("pokemare_loop_lag_seconds"))
+        lines.append("# TYPE pokemare_gateway_latency_seconds gauge")
+        for shard_id, latency in getattr(self.bot, "latencies", []):
+            # NaN until the first heartbeat is acknowledged
+            if latency == latency:
+                lines.append(
+                    f'pokemare_gateway_latency_seconds{{shard="{shard_id}"}} {latency}'
+                )
+        for name, value in self.gauges().items():
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    async def handle(self, request: web.Request) -> web.Response:
+        return web.Response(
+            body=self.render().encode(),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+        )
+
+    async def serve(self, host: str, port: int) -> None:
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        print(f"Serving metrics on http://{host}:{port}/metrics")
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
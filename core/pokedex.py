@@ -0,0 +1,306 @@
+"""Compact, memory-mapped index over ``data/pokemons.json`` and ``data/wtp.json``.
+
+The JSON sources are compiled once into ``data/pokedex.idx``; at runtime the
+file is mapped read-only and records are decoded on first access only.
+
+    python -m core.pokedex    # (re)build the index
+"""
+from __future__ import annotations
+
+import contextlib
+import json
+import mmap
+import os
+import re
+import struct
+import tempfile
+import unicodedata
+from typing import Iterator
+
+POKEMONS_PATH = "data/pokemons.json"
+WTP_PATH = "data/wtp.json"
+INDEX_PATH = "data/pokedex.idx"
+
+MAGIC = b"PKDX"
+VERSION = 1
+# magic, version, reserved, records, forms, aliases, highest dex id
+HEADER = struct.Struct("<4sHHIIII")
+SPAN = struct.Struct("<II")
+ALIAS = struct.Struct("<IIii")
+SLOT = struct.Struct("<i")
+
+_STRIP = re.compile(r"['’`.:]")
+_SEPARATORS = re.compile(r"[\s_\-]+")
+_GENDER = {"♀": " f", "♂": " m"}
+
+
+def normalize(text: str) -> str:
+    for symbol, replacement in _GENDER.items():
+        text = text.replace(symbol, replacement)
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    return _SEPARATORS.sub(" ", _STRIP.sub("", text)).strip()
+
+
+class PokemonRecord:
+    __slots__ = (
+        "dex_id",
+        "name",
+        "types",
+        "species",
+        "abilities",
+        "height",
+        "weight",
+        "base_experience",
+        "gender",
+        "egg_groups",
+        "stats",
+        "evolution_stage",
+        "evolution_line",
+        "sprite",
+        "animated_sprite",
+        "description",
+        "generation",
+    )
+    STAT_NAMES = ("hp", "attack", "defense", "sp_atk", "sp_def", "speed", "total")
+
+    def __init__(self, *fields) -> None:
+        for slot, value in zip(self.__slots__, fields):
+            setattr(self, slot, value)
+
+    def __repr__(self) -> str:
+        return f"<PokemonRecord #{self.dex_id} {self.name}>"
+
+    @property
+    def display_name(self) -> str:
+        return self.name.replace("-", " ").title()
+
+    @classmethod
+    def pack(cls, data: dict) -> list:
+        family = data.get("family") or {}
+        sprites = data.get("sprites") or {}
+        stats = data.get("stats") or {}
+        return [
+            int(data["id"]),
+            data["name"],
+            data["type"],
+            data["species"],
+            data["abilities"],
+            data["height"],
+            data["weight"],
+            int(data["base_experience"] or 0),
+            data["gender"],
+            data["egg_groups"],
+            [int(stats.get(name) or 0) for name in cls.STAT_NAMES],
+            family.get("evolutionStage", 0),
+            family.get("evolutionLine", []),
+            sprites.get("normal"),
+            sprites.get("animated"),
+            data["description"],
+            int(data["generation"]),
+        ]
+
+    @classmethod
+    def unpack(cls, fields: list) -> PokemonRecord:
+        for position in (2, 3, 4, 8, 9, 10, 12):
+            fields[position] = tuple(fields[position])
+        return cls(*fields)
+
+
+class FormRecord:
+    __slots__ = ("image", "name", "base")
+
+    def __init__(self, image: str, name: str, base: PokemonRecord | None) -> None:
+        self.image = image
+        self.name = name
+        self.base = base
+
+    def __repr__(self) -> str:
+        return f"<FormRecord {self.image} {self.name}>"
+
+
+def aliases_for(*names: str) -> set[str]:
+    aliases = set()
+    for name in names:
+        key = normalize(name)
+        aliases.update((key, key.replace(" ", "")))
+    return aliases
+
+
+def compile_index(
+    pokemons_path: str = POKEMONS_PATH,
+    wtp_path: str = WTP_PATH,
+    index_path: str = INDEX_PATH,
+) -> None:
+    with open(pokemons_path, "r", encoding="utf-8") as file:
+        raw_pokemons: dict = json.load(file)
+    with open(wtp_path, "r", encoding="utf-8") as file:
+        raw_forms: dict = json.load(file)
+
+    # pokemons.json lists every entry twice, once by name and once by id
+    unique = {int(data["id"]): data for data in raw_pokemons.values()}
+    pokemons = [unique[dex_id] for dex_id in sorted(unique)]
+    record_by_name = {normalize(data["name"]): i for i, data in enumerate(pokemons)}
+    forms = sorted(raw_forms.items())
+
+    alias_targets: dict[str, list[int]] = {}
+    for index, data in enumerate(pokemons):
+        for alias in aliases_for(data["name"]):
+            alias_targets.setdefault(alias, [-1, -1])[0] = index
+    for index, (image, name) in enumerate(forms):
+        for alias in aliases_for(name, image.rsplit(".", 1)[0]):
+            target = alias_targets.setdefault(alias, [-1, -1])
+            if target[1] == -1:
+                target[1] = index
+
+    blob = bytearray()
+
+    def append(payload: bytes) -> tuple[int, int]:
+        offset = len(blob)
+        blob.extend(payload)
+        return offset, len(payload)
+
+    def encode(value) -> bytes:
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode()
+
+    record_spans = [append(encode(PokemonRecord.pack(data))) for data in pokemons]
+    form_spans = [
+        append(encode([image, name, record_by_name.get(normalize(name), -1)]))
+        for image, name in forms
+    ]
+    alias_rows = [
+        (*append(alias.encode()), *alias_targets[alias])
+        for alias in sorted(alias_targets)
+    ]
+    highest = max(unique)
+    slots = [-1] * (highest + 1)
+    for index, data in enumerate(pokemons):
+        slots[int(data["id"])] = index
+
+    tables = bytearray()
+    for span in (*record_spans, *form_spans):
+        tables += SPAN.pack(*span)
+    for row in alias_rows:
+        tables += ALIAS.pack(*row)
+    for slot in slots:
+        tables += SLOT.pack(slot)
+
+    header = HEADER.pack(
+        MAGIC, VERSION, 0, len(record_spans), len(form_spans), len(alias_rows), highest
+    )
+    # a temp file of its own, so concurrent builds never write the same one
+    descriptor, temporary = tempfile.mkstemp(
+        dir=os.path.dirname(index_path) or ".", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(header + tables + blob)
+        os.replace(temporary, index_path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(temporary)
+        raise
+
+
+def index_is_stale(
+    index_path: str = INDEX_PATH, sources: tuple[str, ...] = (POKEMONS_PATH, WTP_PATH)
+) -> bool:
+    try:
+        built = os.path.getmtime(index_path)
+        with open(index_path, "rb") as file:
+            magic, version, *_ = HEADER.unpack(file.read(HEADER.size))
+    except (OSError, struct.error):
+        return True
+    if magic != MAGIC or version != VERSION:
+        return True
+    return any(os.path.getmtime(source) > built for source in sources)
+
+
+class Pokedex:
+    def __init__(self, buffer: mmap.mmap | bytes) -> None:
+        self._buffer = buffer
+        view = memoryview(buffer)
+        magic, version, _, records, forms, aliases, highest = HEADER.unpack_from(view)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a pokedex index or built by another version.")
+        offset = HEADER.size
+        self._record_spans = view[offset : offset + records * SPAN.size].cast("I")
+        offset += records * SPAN.size
+        self._form_spans = view[offset : offset + forms * SPAN.size].cast("I")
+        offset += forms * SPAN.size
+        self._alias_rows = view[offset : offset + aliases * ALIAS.size]
+        offset += aliases * ALIAS.size
+        self._slots = view[offset : offset + (highest + 1) * SLOT.size].cast("i")
+        self._blob = view[offset + (highest + 1) * SLOT.size :]
+
+        self._records: list[PokemonRecord | None] = [None] * records
+        self._forms: list[FormRecord | None] = [None] * forms
+        self._aliases: dict[str, tuple[int, int]] | None = None
+
+    @classmethod
+    def open(cls, index_path: str = INDEX_PATH, rebuild: bool = True) -> Pokedex:
+        if rebuild and index_is_stale(index_path):
+            compile_index(index_path=index_path)
+        with open(index_path, "rb") as file:
+            return cls(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self) -> Iterator[PokemonRecord]:
+        return (self.record(i) for i in range(len(self._records)))
+
+    def _decode(self, spans: memoryview, index: int):
+        offset, length = spans[index * 2], spans[index * 2 + 1]
+        return json.loads(bytes(self._blob[offset : offset + length]))
+
+    def record(self, index: int) -> PokemonRecord:
+        record = self._records[index]
+        if record is None:
+            record = PokemonRecord.unpack(self._decode(self._record_spans, index))
+            self._records[index] = record
+        return record
+
+    def form_record(self, index: int) -> FormRecord:
+        form = self._forms[index]
+        if form is None:
+            image, name, base = self._decode(self._form_spans, index)
+            form = FormRecord(image, name, self.record(base) if base >= 0 else None)
+            self._forms[index] = form
+        return form
+
+    @property
+    def forms(self) -> Iterator[FormRecord]:
+        return (self.form_record(i) for i in range(len(self._forms)))
+
+    @property
+    def aliases(self) -> dict[str, tuple[int, int]]:
+        if self._aliases is None:
+            aliases = {}
+            for offset, length, record, form in ALIAS.iter_unpack(self._alias_rows):
+                key = bytes(self._blob[offset : offset + length]).decode()
+                aliases[key] = (record, form)
+            self._aliases = aliases
+        return self._aliases
+
+    def by_id(self, dex_id: int) -> PokemonRecord | None:
+        if not 0 < dex_id < len(self._slots) or self._slots[dex_id] < 0:
+            return None
+        return self.record(self._slots[dex_id])
+
+    def by_name(self, name: str) -> PokemonRecord | None:
+        record, _ = self.aliases.get(normalize(name), (-1, -1))
+        return self.record(record) if record >= 0 else None
+
+    def form(self, name: str) -> FormRecord | None:
+        _, form = self.aliases.get(normalize(name), (-1, -1))
+        return self.form_record(form) if form >= 0 else None
+
+
+if __name__ == "__main__":
+    compile_index()
+    pokedex = Pokedex.open(rebuild=False)
+    print(
+        f"Wrote {INDEX_PATH}: {len(pokedex)} pokemons, {len(pokedex._forms)} forms, "
+        f"{len(pokedex.aliases)} aliases, {os.path.getsize(INDEX_PATH)} bytes"
+    )
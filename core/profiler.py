@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import functools
+import io
+import marshal
+import os
+import pstats
+import re
+import sys
+import threading
+from collections import Counter
+from typing import Any, Coroutine, Generator
+
+from disnake.ext import commands
+
+_WORKER = re.compile(r"_\d+$")
+
+
+def frame_label(code) -> str:
+    path = code.co_filename
+    if path.startswith(os.getcwd()):
+        path = os.path.relpath(path)
+    else:
+        path = os.path.basename(path)
+    return f"{code.co_name} ({path}:{code.co_firstlineno})".replace(";", ",")
+
+
+class StackSampler(threading.Thread):
+    """Samples every thread's stack at a fixed interval.
+
+    Only ``sys._current_frames`` runs per sample, from a thread of its own,
+    so the event loop is never paused for longer than the GIL switch. The
+    result is in collapsed-stack format, one ``thread;outer;...;inner count``
+    line per distinct stack, which flamegraph.pl and speedscope read as is.
+    Executor workers are merged by name, ``sqlite_0`` and ``sqlite_1``
+    become ``sqlite``.
+    """
+
+    def __init__(self, interval: float = 0.005) -> None:
+        super().__init__(name="stack-sampler", daemon=True)
+        self.interval = interval
+        # (thread name, code objects from the outermost frame in)
+        self.stacks: Counter[tuple] = Counter()
+        self.samples = 0
+        self._stopping = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopping.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == self.ident:
+                    continue
+                codes = []
+                while frame is not None:
+                    codes.append(frame.f_code)
+                    frame = frame.f_back
+                codes.append(names.get(ident, str(ident)))
+                self.stacks[tuple(reversed(codes))] += 1
+            self.samples += 1
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self.join()
+
+    def collapsed(self) -> str:
+        labels: dict[Any, str] = {}
+        merged: Counter[str] = Counter()
+        for (thread, *codes), count in self.stacks.items():
+            for code in codes:
+                if code not in labels:
+                    labels[code] = frame_label(code)
+            stack = [_WORKER.sub("", thread), *(labels[code] for code in codes)]
+            merged[";".join(stack)] += count
+        return "".join(f"{stack} {count}\n" for stack, count in merged.most_common())
+
+    async def sample_for(self, seconds: float) -> str:
+        self.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            await asyncio.to_thread(self.stop)
+        return self.collapsed()
+
+
+class _Profiled:
+    """Runs a coroutine with ``profile`` enabled only while it is executing.
+
+    Every step of the coroutine is bracketed by ``enable``/``disable``, so
+    the other tasks interleaved at its awaits are not attributed to it.
+    """
+
+    def __init__(self, coro: Coroutine, profile: cProfile.Profile) -> None:
+        self.coro = coro
+        self.profile = profile
+
+    def __await__(self) -> Generator[Any, Any, Any]:
+        value, error = None, None
+        while True:
+            self.profile.enable()
+            try:
+                if error is None:
+                    yielded = self.coro.send(value)
+                else:
+                    yielded = self.coro.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                self.profile.disable()
+            try:
+                value, error = (yield yielded), None
+            except BaseException as raised:
+                value, error = None, raised
+
+
+class CommandProfiler:
+    """Deterministic profiles of chosen slash commands, per invocation.
+
+    :meth:`wrap` swaps the command's callback for one that runs under
+    :class:`cProfile.Profile`; the invocations of a command are added up
+    until :meth:`unwrap` restores it.
+    """
+
+    def __init__(self, bot: commands.InteractionBot) -> None:
+        self.bot = bot
+        self.wrapped: dict[str, Any] = {}
+        self.stats: dict[str, pstats.Stats] = {}
+        self.invocations: Counter[str] = Counter()
+
+    def find(self, name: str):
+        """A slash command by its name or by its callback's name."""
+        pending = list(self.bot.slash_commands)
+        while pending:
+            command = pending.pop()
+            if name in (command.qualified_name, command.callback.__name__):
+                return command
+            pending.extend(getattr(command, "children", {}).values())
+        return None
+
+    def wrap(self, name: str) -> bool:
+        command = self.find(name)
+        if command is None:
+            return False
+        key = command.qualified_name
+        if key in self.wrapped:
+            return True
+        original = self.wrapped[key] = command.callback
+
+        @functools.wraps(original)
+        async def profiled(*args, **kwargs):
+            profile = cProfile.Profile()
+            try:
+                return await _Profiled(original(*args, **kwargs), profile)
+            finally:
+                self.invocations[key] += 1
+                if key in self.stats:
+                    self.stats[key].add(profile)
+                else:
+                    self.stats[key] = pstats.Stats(profile)
+
+        command._callback = profiled
+        return True
+
+    def unwrap(self) -> None:
+        for key, original in self.wrapped.items():
+            command = self.find(key)
+            if command is not None:
+                command._callback = original
+        self.wrapped.clear()
+
+    def reset(self) -> None:
+        self.stats.clear()
+        self.invocations.clear()
+
+    def top(self, key: str, limit: int = 10, sort: str = "tottime") -> list[tuple]:
+        """``(calls, tottime, cumtime, function)`` of the hottest functions."""
+        stats = self.stats[key].stats  # type: ignore[attr-defined]
+        column = {"tottime": 2, "cumtime": 3}[sort]
+        rows = sorted(stats.items(), key=lambda item: item[1][column], reverse=True)
+        return [
+            (calls, tottime, cumtime, _function_label(function))
+            for function, (_, calls, tottime, cumtime, _) in rows[:limit]
+        ]
+
+    def dump(self, key: str) -> io.BytesIO:
+        """The merged stats as a ``.pstats`` file for snakeviz or pstats."""
+        stats = self.stats[key].stats  # type: ignore[attr-defined]
+        return io.BytesIO(marshal.dumps(stats))
+
+
+def _function_label(function: tuple[str, int, str]) -> str:
+    path, line, name = function
+    if path == "~":
+        return name
+    return f"{name} ({os.path.basename(path)}:{line})"
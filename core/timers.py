@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import asyncio
+import math
+from typing import Callable
+
+
+class Timer:
+    __slots__ = ("tick", "callback", "cancelled")
+
+    def __init__(self, tick: int, callback: Callable[[], object]) -> None:
+        self.tick = tick
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+
+class TimerWheel:
+    """Hierarchical timer wheel driven by a single asyncio task.
+
+    Deadlines are rounded up to ``tick`` seconds. Level ``n`` has ``slots``
+    buckets, each spanning ``slots ** n`` ticks; when a lower level wraps,
+    the next bucket of the level above is cascaded down. Scheduling and
+    cancelling are O(1), however many timers are pending.
+    """
+
+    def __init__(self, tick: float = 0.1, slots: int = 64, levels: int = 4) -> None:
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        self.wheels: list[list[list[Timer]]] = [
+            [[] for _ in range(slots)] for _ in range(levels)
+        ]
+        self.overflow: list[Timer] = []
+        self.current = 0
+        self.pending = 0
+        self._origin: float | None = None
+        self._task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return self.pending
+
+    def start(self) -> None:
+        if self._task is None:
+            self._origin = asyncio.get_running_loop().time()
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def now(self) -> float:
+        return asyncio.get_running_loop().time()
+
+    def schedule(self, delay: float, callback: Callable[[], object]) -> Timer:
+        self.start()
+        ticks = math.ceil((self.now() + delay - self._origin) / self.tick)
+        timer = Timer(max(ticks, self.current + 1), callback)
+        self._place(timer)
+        self.pending += 1
+        return timer
+
+    def _place(self, timer: Timer) -> None:
+        span = 1
+        for wheel in self.wheels:
+            # a timer lives on the lowest level whose higher digits it shares
+            # with the current tick, in the bucket of its own digit there
+            if timer.tick // (span * self.slots) == self.current // (span * self.slots):
+                wheel[(timer.tick // span) % self.slots].append(timer)
+                return
+            span *= self.slots
+        self.overflow.append(timer)
+
+    def _advance(self) -> None:
+        self.current += 1
+        span = self.slots ** (self.levels - 1)
+        if self.current % (span * self.slots) == 0:
+            overflow, self.overflow = self.overflow, []
+            for timer in overflow:
+                self._place(timer)
+        for level in reversed(range(1, self.levels)):
+            span = self.slots**level
+            if self.current % span == 0:
+                bucket = self.wheels[level][(self.current // span) % self.slots]
+                timers = bucket[:]
+                bucket.clear()
+                for timer in timers:
+                    self._place(timer)
+        bucket = self.wheels[0][self.current % self.slots]
+        due = bucket[:]
+        bucket.clear()
+        for timer in due:
+            self.pending -= 1
+            if timer.cancelled:
+                continue
+            try:
+                timer.callback()
+            except Exception as error:
+                print(f"Timer callback failed: {error!r}")
+
+    async def _run(self) -> None:
+        while True:
+            target = self._origin + (self.current + 1) * self.tick
+            delay = target - self.now()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            # catch up on every tick that passed while the loop was busy
+            elapsed = math.floor((self.now() - self._origin) / self.tick)
+            while self.current < elapsed:
+                self._advance()
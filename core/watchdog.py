@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import asyncio
+import collections
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Any
+
+from .metrics import Histogram
+
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+_HERE = os.path.abspath(__file__)
+_ROOT = os.path.dirname(os.path.dirname(_HERE))
+
+
+class LoopEvent:
+    __slots__ = ("kind", "when", "duration", "site", "stack")
+
+    def __init__(
+        self, kind: str, when: float, duration: float, site: str, stack: str = ""
+    ) -> None:
+        self.kind = kind
+        self.when = when
+        self.duration = duration
+        self.site = site
+        self.stack = stack
+
+
+def blame(frames: list[tuple[str, int, str]]) -> str:
+    """The innermost frame in the bot's own code, else the innermost frame."""
+    for path, line, name in reversed(frames):
+        if path.startswith(_ROOT) and path != _HERE and "site-packages" not in path:
+            return f"{name} ({os.path.relpath(path, _ROOT)}:{line})"
+    if frames:
+        path, line, name = frames[-1]
+        return f"{name} ({os.path.basename(path)}:{line})"
+    return "unknown"
+
+
+def callback_site(handle: asyncio.Handle) -> str:
+    callback = handle._callback
+    task = getattr(callback, "__self__", None)
+    if isinstance(task, asyncio.Task):
+        # a task step: follow the awaits down to where it is suspended now
+        frames = []
+        coro = task.get_coro()
+        while coro is not None:
+            code = getattr(coro, "cr_code", None) or getattr(coro, "gi_code", None)
+            if code is None:
+                break
+            frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+            line = frame.f_lineno if frame is not None else code.co_firstlineno
+            frames.append((code.co_filename, line, code.co_name))
+            coro = getattr(coro, "cr_await", None) or getattr(
+                coro, "gi_yieldfrom", None
+            )
+        if frames:
+            return blame(frames)
+    code = getattr(callback, "__code__", None)
+    if code is not None:
+        return blame([(code.co_filename, code.co_firstlineno, code.co_name)])
+    return repr(callback)[:120]
+
+
+class LoopWatchdog:
+    """Event-loop lag, slow callbacks and stalls, kept in a rolling history.
+
+    A heartbeat task measures how late the loop wakes it up. On the stock
+    asyncio loop every callback is timed, and ones slower than ``slow``
+    seconds are logged. A side thread watches the heartbeat: once the loop
+    has not come back for ``block`` seconds it captures the loop thread's
+    stack, which names the code holding it. On uvloop, where callbacks
+    cannot be timed individually, the side thread does the same from
+    ``slow`` seconds on and logs those as slow callbacks.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.1,
+        slow: float = 0.1,
+        block: float = 1.0,
+        history: int = 200,
+    ) -> None:
+        self.interval = interval
+        self.slow = slow
+        self.block = block
+        self.lag = Histogram(LAG_BUCKETS)
+        self.recent_lag: collections.deque[float] = collections.deque(maxlen=600)
+        self.events: collections.deque[LoopEvent] = collections.deque(maxlen=history)
+        self.stalls = 0
+        self.slow_callbacks = 0
+        self._beat = time.monotonic()
+        self._stall: LoopEvent | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread: int | None = None
+        self._task: asyncio.Task | None = None
+        self._thread: threading.Thread | None = None
+        self._closing = threading.Event()
+        self._original_run: Any = None
+
+    @classmethod
+    def from_env(cls) -> LoopWatchdog:
+        return cls(
+            slow=float(os.getenv("LOOP_SLOW_CALLBACK_MS", 100)) / 1000,
+            block=float(os.getenv("LOOP_BLOCK_MS", 1000)) / 1000,
+        )
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._task = asyncio.create_task(self._heartbeat())
+        if isinstance(self._loop, asyncio.BaseEventLoop):
+            self._time_callbacks()
+        self._thread = threading.Thread(
+            target=self._watch, name="loop-watchdog", daemon=True
+        )
+        self._thread.start()
+
+    async def close(self) -> None:
+        if self._original_run is not None:
+            asyncio.Handle._run = self._original_run
+            self._original_run = None
+        if self._thread is not None:
+            self._closing.set()
+            await asyncio.to_thread(self._thread.join)
+            self._thread = None
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _time_callbacks(self) -> None:
+        original = self._original_run = asyncio.Handle._run
+        watchdog = self
+
+        def _run(handle: asyncio.Handle) -> None:
+            started = time.perf_counter()
+            original(handle)
+            elapsed = time.perf_counter() - started
+            if elapsed >= watchdog.slow:
+                watchdog.slow_callback(handle, elapsed)
+
+        asyncio.Handle._run = _run
+
+    def slow_callback(self, handle: asyncio.Handle, elapsed: float) -> None:
+        self.slow_callbacks += 1
+        if self._stall is not None:
+            # already caught in the act by the side thread, with its stack
+            self._stall.duration = elapsed
+            return
+        site = callback_site(handle)
+        self.events.append(LoopEvent("slow", time.time(), elapsed, site))
+        print(f"Slow callback: {site} held the event loop for {elapsed * 1000:.0f}ms")
+
+    async def _heartbeat(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - expected, 0.0)
+            self.lag.observe(lag)
+            self.recent_lag.append(lag)
+            self._beat = time.monotonic()
+            stall, self._stall = self._stall, None
+            if stall is None:
+                continue
+            stall.duration = max(stall.duration, lag)
+            if stall.kind == "slow":
+                print(
+                    f"Slow callback: {stall.site} held the event loop for "
+                    f"{stall.duration * 1000:.0f}ms"
+                )
+            else:
+                print(
+                    f"Event loop was blocked for {stall.duration * 1000:.0f}ms "
+                    f"by {stall.site}\n" + stall.stack
+                )
+
+    def _watch(self) -> None:
+        # without callback timing (uvloop) this thread catches slow ones too
+        timed = self._original_run is not None
+        threshold = self.block if timed else min(self.slow, self.block)
+        while not self._closing.wait(min(threshold / 4, 0.25)):
+            blocked = time.monotonic() - self._beat - self.interval
+            stall = self._stall
+            if stall is not None:
+                if stall.kind == "slow" and blocked >= self.block:
+                    # still the same blockage, now long enough to be a stall
+                    stall.kind = "stall"
+                    self.stalls += 1
+                continue
+            if blocked < threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            summary = traceback.extract_stack(frame)
+            stall = LoopEvent(
+                "stall" if blocked >= self.block else "slow",
+                time.time() - blocked,
+                blocked,
+                blame([(f.filename, f.lineno, f.name) for f in summary]),
+                "".join(summary.format()),
+            )
+            if stall.kind == "stall":
+                self.stalls += 1
+            else:
+                self.slow_callbacks += 1
+            self._stall = stall
+            self.events.append(stall)
+
+    def lag_quantile(self, q: float) -> float:
+        """Over the last minute of heartbeats."""
+        if not self.recent_lag:
+            return 0.0
+        ordered = sorted(self.recent_lag)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+    def blamed(self, limit: int = 10) -> list[tuple[str, int, float, float]]:
+        """``(site, events, total seconds, worst seconds)``, worst offenders first."""
+        sites: dict[str, list] = {}
+        for event in self.events:
+            entry = sites.setdefault(event.site, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += event.duration
+            entry[2] = max(entry[2], event.duration)
+        ranked = sorted(sites.items(), key=lambda item: item[1][1], reverse=True)
+        return [(site, *entry) for site, entry in ranked[:limit]]
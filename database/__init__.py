@@ -1,2 +1,10 @@
+from .access import *
+from .backends import *
+from .cache import *
+from .directory import *
 from .gtp_stats import *
 from .user import *
+from .migrations import *
+from .rank_index import *
+from .sqlite import *
+from .stats import *
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import os
+import re
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Iterable, Sequence
+
+import aiomysql
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(sql: str) -> str:
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+class QueryTiming:
+    __slots__ = ("sql", "pool_wait", "execution", "rows")
+
+    def __init__(self, sql: str, pool_wait: float, execution: float, rows: int) -> None:
+        self.sql = sql
+        self.pool_wait = pool_wait
+        self.execution = execution
+        self.rows = rows
+
+    def __repr__(self) -> str:
+        return (
+            f"<QueryTiming wait={self.pool_wait * 1000:.2f}ms "
+            f"exec={self.execution * 1000:.2f}ms rows={self.rows} sql={self.sql[:60]!r}>"
+        )
+
+
+class QueryStats:
+    __slots__ = ("count", "pool_wait", "execution", "rows", "max_execution")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.pool_wait = 0.0
+        self.execution = 0.0
+        self.rows = 0
+        self.max_execution = 0.0
+
+    def add(self, timing: QueryTiming) -> None:
+        self.count += 1
+        self.pool_wait += timing.pool_wait
+        self.execution += timing.execution
+        self.rows += timing.rows
+        self.max_execution = max(self.max_execution, timing.execution)
+
+
+class Transaction:
+    """Statements run on one pooled connection, committed together."""
+
+    def __init__(
+        self, database: Database, conn: aiomysql.Connection, pool_wait: float
+    ) -> None:
+        self.database = database
+        self.conn = conn
+        self._pool_wait = pool_wait
+
+    def _record(self, sql: str, started: float, rows: int) -> None:
+        # the pool wait belongs to the first statement on the connection
+        pool_wait, self._pool_wait = self._pool_wait, 0.0
+        self.database.record(
+            QueryTiming(
+                normalize_sql(sql), pool_wait, time.perf_counter() - started, rows
+            )
+        )
+
+    async def execute(self, sql: str, values: Sequence | None = None) -> int:
+        started = time.perf_counter()
+        async with self.conn.cursor() as cursor:
+            cursor: aiomysql.Cursor
+            await cursor.execute(sql, values)
+            rows = cursor.rowcount
+        self._record(sql, started, rows)
+        return rows
+
+    async def executemany(self, sql: str, values: Iterable[Sequence]) -> int:
+        values = list(values)
+        if not values:
+            return 0
+        started = time.perf_counter()
+        async with self.conn.cursor() as cursor:
+            cursor: aiomysql.Cursor
+            await cursor.executemany(sql, values)
+            rows = cursor.rowcount
+        self._record(sql, started, rows)
+        return rows
+
+    async def fetchall(self, sql: str, values: Sequence | None = None) -> list[tuple]:
+        started = time.perf_counter()
+        async with self.conn.cursor() as cursor:
+            cursor: aiomysql.Cursor
+            await cursor.execute(sql, values)
+            data = await cursor.fetchall()
+        self._record(sql, started, len(data))
+        return list(data)
+
+    async def fetchone(self, sql: str, values: Sequence | None = None) -> tuple | None:
+        started = time.perf_counter()
+        async with self.conn.cursor() as cursor:
+            cursor: aiomysql.Cursor
+            await cursor.execute(sql, values)
+            data = await cursor.fetchone()
+        self._record(sql, started, 1 if data else 0)
+        return data
+
+
+class Database:
+    """Shared data-access layer used by every repository in this package.
+
+    Each call acquires a connection, runs inside a transaction and records a
+    :class:`QueryTiming`; use :meth:`transaction` to run several statements on
+    a single connection and commit.
+    """
+
+    dialect = "mysql"
+
+    def __init__(
+        self, pool: aiomysql.Pool, acquire_timeout: float = 10.0, history: int = 500
+    ) -> None:
+        self.pool = pool
+        self.acquire_timeout = acquire_timeout
+        self.stats: dict[str, QueryStats] = {}
+        self.recent: deque[QueryTiming] = deque(maxlen=history)
+        self.listeners: list[Callable[[QueryTiming], Any]] = []
+
+    @classmethod
+    async def create(
+        cls,
+        *,
+        minsize: int = 1,
+        maxsize: int = 10,
+        acquire_timeout: float = 10.0,
+        **connect_kwargs: Any,
+    ) -> Database:
+        pool = await aiomysql.create_pool(
+            minsize=minsize, maxsize=maxsize, autocommit=False, **connect_kwargs
+        )
+        return cls(pool, acquire_timeout=acquire_timeout)
+
+    @classmethod
+    async def from_env(cls) -> Database:
+        # getting configs from the .env file and setting up the database
+        return await cls.create(
+            host=os.getenv("MYSQLHOST"),
+            user=os.getenv("MYSQLUSER"),
+            db=os.getenv("MYSQLDATABASE"),
+            password=os.getenv("MYSQLPASSWORD"),
+            port=int(os.getenv("MYSQLPORT")),
+            minsize=int(os.getenv("DB_POOL_MIN_SIZE", 1)),
+            maxsize=int(os.getenv("DB_POOL_MAX_SIZE", 10)),
+            acquire_timeout=float(os.getenv("DB_ACQUIRE_TIMEOUT", 10)),
+        )
+
+    async def close(self) -> None:
+        self.pool.close()
+        await self.pool.wait_closed()
+
+    def record(self, timing: QueryTiming) -> None:
+        self.recent.append(timing)
+        stats = self.stats.get(timing.sql)
+        if stats is None:
+            stats = self.stats[timing.sql] = QueryStats()
+        stats.add(timing)
+        for listener in self.listeners:
+            listener(timing)
+
+    @contextlib.asynccontextmanager
+    async def acquire(self) -> AsyncIterator[tuple[aiomysql.Connection, float]]:
+        started = time.perf_counter()
+        conn: aiomysql.Connection = await asyncio.wait_for(
+            self._acquire(), timeout=self.acquire_timeout
+        )
+        try:
+            yield conn, time.perf_counter() - started
+        finally:
+            self.pool.release(conn)
+
+    async def _acquire(self) -> aiomysql.Connection:
+        return await self.pool.acquire()
+
+    @contextlib.asynccontextmanager
+    async def transaction(self) -> AsyncIterator[Transaction]:
+        async with self.acquire() as (conn, pool_wait):
+            try:
+                yield Transaction(self, conn, pool_wait)
+                await conn.commit()
+            except BaseException:
+                with contextlib.suppress(Exception):
+                    await conn.rollback()
+                raise
+
+    async def execute(self, sql: str, values: Sequence | None = None) -> int:
+        async with self.transaction() as tr:
+            return await tr.execute(sql, values)
+
+    async def executemany(self, sql: str, values: Iterable[Sequence]) -> int:
+        async with self.transaction() as tr:
+            return await tr.executemany(sql, values)
+
+    async def fetchall(self, sql: str, values: Sequence | None = None) -> list[tuple]:
+        async with self.transaction() as tr:
+            return await tr.fetchall(sql, values)
+
+    async def fetchone(self, sql: str, values: Sequence | None = None) -> tuple | None:
+        async with self.transaction() as tr:
+            return await tr.fetchone(sql, values)
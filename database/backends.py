@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+import os
+
+from .access import Database
+from .sqlite import SQLiteDatabase
+
+BACKENDS: dict[str, type[Database]] = {"mysql": Database, "sqlite": SQLiteDatabase}
+
+
+async def database_from_env() -> Database:
+    """Open the storage backend named by ``DB_BACKEND`` (``mysql`` by default)."""
+    name = os.getenv("DB_BACKEND", "mysql").lower()
+    backend = BACKENDS.get(name)
+    if backend is None:
+        raise RuntimeError(
+            f"Unknown DB_BACKEND {name!r}, expected one of {', '.join(BACKENDS)}."
+        )
+    return await backend.from_env()
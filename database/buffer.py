@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from collections import defaultdict
+from typing import Any, Callable
+
+from .access import Database
+
+
+class RewardBuffer:
+    """Write-behind buffer for game rewards.
+
+    Coin and guess increments are summed in memory and written as one
+    multi-row upsert per table, both inside a single transaction, either
+    every ``interval`` seconds or once ``max_pending`` keys are waiting.
+    """
+
+    def __init__(
+        self,
+        db: Database,
+        interval: float = 5.0,
+        max_pending: int = 500,
+        retry_delay: float = 1.0,
+        max_retry_delay: float = 60.0,
+    ) -> None:
+        self.db = db
+        self.interval = interval
+        self.max_pending = max_pending
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+
+        self.coins: defaultdict[int, int] = defaultdict(int)
+        self.guesses: defaultdict[tuple[int, int], int] = defaultdict(int)
+        # increments taken out for the running flush, still visible to reads
+        # until the transaction commits
+        self.inflight_coins: dict[int, int] = {}
+        self.inflight_guesses: dict[tuple[int, int], int] = {}
+
+        # bumped after every committed flush
+        self.flushes = 0
+        # called with the coins and guesses of every committed flush
+        self.listeners: list[
+            Callable[[dict[int, int], dict[tuple[int, int], int]], Any]
+        ] = []
+
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._closed = False
+
+    def __len__(self) -> int:
+        return len(self.coins) + len(self.guesses)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        self._closed = True
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        delay = self.retry_delay
+        for _ in range(5):
+            try:
+                await self.flush()
+                return
+            except Exception as error:
+                print(f"Reward flush on shutdown failed, retrying: {error!r}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_retry_delay)
+        print(f"Dropping {len(self)} buffered reward rows after repeated failures.")
+
+    def add_coins(self, user_id: int, coins: int) -> None:
+        self.coins[user_id] += coins
+        self._check_threshold()
+
+    def add_guess(self, user_id: int, guild_id: int, guesses: int = 1) -> None:
+        self.guesses[(user_id, guild_id)] += guesses
+        self._check_threshold()
+
+    def pending_coins(self, user_id: int) -> int:
+        return self.coins.get(user_id, 0) + self.inflight_coins.get(user_id, 0)
+
+    def pending_guesses(self, user_id: int, guild_id: int | None = None) -> int:
+        if guild_id is not None:
+            key = (user_id, guild_id)
+            return self.guesses.get(key, 0) + self.inflight_guesses.get(key, 0)
+        return sum(
+            count
+            for table in (self.guesses, self.inflight_guesses)
+            for (uid, _), count in table.items()
+            if uid == user_id
+        )
+
+    def pending_guild_guesses(self, user_id: int) -> dict[int, int]:
+        guilds: dict[int, int] = {}
+        for table in (self.guesses, self.inflight_guesses):
+            for (uid, guild_id), count in table.items():
+                if uid == user_id:
+                    guilds[guild_id] = guilds.get(guild_id, 0) + count
+        return guilds
+
+    def _check_threshold(self) -> None:
+        if len(self) >= self.max_pending:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        delay = self.retry_delay
+        while not self._closed:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as error:
+                print(f"Reward flush failed, retrying in {delay}s: {error!r}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_retry_delay)
+                self._wakeup.set()
+            else:
+                delay = self.retry_delay
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            if not self.coins and not self.guesses:
+                return
+            self.inflight_coins, self.coins = dict(self.coins), defaultdict(int)
+            self.inflight_guesses, self.guesses = dict(self.guesses), defaultdict(int)
+            coins, guesses = self.inflight_coins, self.inflight_guesses
+            try:
+                await self._write(coins, guesses)
+                self.flushes += 1
+            except BaseException:
+                # put everything back so the next attempt includes it
+                for user_id, coins in self.inflight_coins.items():
+                    self.coins[user_id] += coins
+                for key, guesses in self.inflight_guesses.items():
+                    self.guesses[key] += guesses
+                raise
+            finally:
+                self.inflight_coins = {}
+                self.inflight_guesses = {}
+        for listener in self.listeners:
+            listener(coins, guesses)
+
+    async def _write(
+        self, coins: dict[int, int], guesses: dict[tuple[int, int], int]
+    ) -> None:
+        async with self.db.transaction() as tr:
+            # executemany folds these into a single multi-row INSERT
+            await tr.executemany(
+                """
+                INSERT INTO currency ( user_id, coins )
+                VALUES ( %s, %s )
+                ON DUPLICATE KEY UPDATE coins = coins + VALUES(coins)
+                """,
+                coins.items(),
+            )
+            await tr.executemany(
+                """
+                INSERT INTO guesses ( user_id, guild_id, guesses )
+                VALUES ( %s, %s, %s )
+                ON DUPLICATE KEY UPDATE guesses = guesses + VALUES(guesses)
+                """,
+                ((u, g, n) for (u, g), n in guesses.items()),
+            )
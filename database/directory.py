@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from typing import Iterable
+
+import disnake
+from disnake.ext import commands
+
+from .access import Database
+from .cache import TTLCache
+
+
+class DirectoryEntry:
+    __slots__ = ("user_id", "name", "avatar")
+
+    def __init__(self, user_id: int, name: str, avatar: str | None) -> None:
+        self.user_id = user_id
+        self.name = name
+        self.avatar = avatar
+
+    def __str__(self) -> str:
+        return self.name
+
+    def __eq__(self, other: object) -> bool:
+        return (
+            isinstance(other, DirectoryEntry)
+            and self.user_id == other.user_id
+            and self.name == other.name
+            and self.avatar == other.avatar
+        )
+
+    @property
+    def avatar_url(self) -> str:
+        if self.avatar is None:
+            return f"https://cdn.discordapp.com/embed/avatars/{(self.user_id >> 22) % 6}.png"
+        extension = "gif" if self.avatar.startswith("a_") else "png"
+        return f"https://cdn.discordapp.com/avatars/{self.user_id}/{self.avatar}.{extension}"
+
+    @classmethod
+    def from_user(cls, user: disnake.abc.User) -> DirectoryEntry:
+        avatar = user.avatar.key if user.avatar else None
+        return cls(user.id, str(user), avatar)
+
+    @classmethod
+    def unknown(cls, user_id: int) -> DirectoryEntry:
+        return cls(user_id, f"Trainer {user_id}", None)
+
+
+class UserDirectory:
+    """Names and avatars of everyone who shows up on a leaderboard.
+
+    Entries are learnt from gateway events and command invocations and
+    persisted in the ``users`` table, so leaderboards never have to ask the
+    Discord API who a user id belongs to.
+    """
+
+    bot: commands.Bot
+    db: Database
+
+    def __init__(self, flush_interval: float = 10.0) -> None:
+        self.cache: TTLCache[int, DirectoryEntry] = TTLCache(maxsize=10_000, ttl=3600)
+        self.flush_interval = flush_interval
+        self.pending: dict[int, DirectoryEntry] = {}
+        self._task: asyncio.Task | None = None
+
+    async def setup(self, bot: commands.Bot) -> None:
+        # the table itself is owned by database.migrations
+        self.db = bot.db
+        self.bot = bot
+        bot.add_listener(self.on_user_update)
+        bot.add_listener(self.on_member_join)
+        bot.add_listener(self.on_application_command)
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        await self.flush()
+
+    def remember(self, user: disnake.abc.User) -> None:
+        if user.bot:
+            return
+        entry = DirectoryEntry.from_user(user)
+        if self.cache.get(user.id) != entry:
+            self.pending[user.id] = entry
+            cluster = getattr(self.bot, "cluster", None)
+            if cluster is not None:
+                cluster.publish(
+                    "user",
+                    {"user_id": user.id, "name": entry.name, "avatar": entry.avatar},
+                )
+        self.cache.set(user.id, entry)
+
+    def join_cluster(self, cluster) -> None:
+        # another process saw a rename first; the row is written by that process
+        cluster.subscribe(
+            "user",
+            lambda data: self.cache.set(
+                data["user_id"],
+                DirectoryEntry(data["user_id"], data["name"], data["avatar"]),
+            ),
+        )
+
+    async def on_user_update(self, before: disnake.User, after: disnake.User) -> None:
+        self.remember(after)
+
+    async def on_member_join(self, member: disnake.Member) -> None:
+        self.remember(member)
+
+    async def on_application_command(self, inter: disnake.AppCmdInter) -> None:
+        self.remember(inter.author)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as error:
+                print(f"User directory flush failed: {error!r}")
+
+    async def flush(self) -> None:
+        if not self.pending:
+            return
+        entries, self.pending = self.pending, {}
+        try:
+            await self.db.executemany(
+                """
+                INSERT INTO users ( user_id, name, avatar )
+                VALUES ( %s, %s, %s )
+                ON DUPLICATE KEY UPDATE name = VALUES(name), avatar = VALUES(avatar)
+                """,
+                ((e.user_id, e.name, e.avatar) for e in entries.values()),
+            )
+        except BaseException:
+            # newer entries for the same user win over the failed batch
+            self.pending = {**entries, **self.pending}
+            raise
+
+    async def resolve(self, user_ids: Iterable[int]) -> dict[int, DirectoryEntry]:
+        resolved: dict[int, DirectoryEntry] = {}
+        missing = []
+        for user_id in user_ids:
+            entry = self.cache.get(user_id)
+            if entry is None and (user := self.bot.get_user(user_id)):
+                self.remember(user)
+                entry = self.cache.get(user_id)
+            if entry is None:
+                missing.append(user_id)
+            else:
+                resolved[user_id] = entry
+        if missing:
+            # one query for the whole page, never a REST call per row
+            placeholders = ", ".join(["%s"] * len(missing))
+            raw = await self.db.fetchall(
+                f"SELECT user_id, name, avatar FROM users WHERE user_id IN ({placeholders})",
+                missing,
+            )
+            for user_id, name, avatar in raw:
+                entry = resolved[user_id] = DirectoryEntry(user_id, name, avatar)
+                self.cache.set(user_id, entry)
+            for user_id in missing:
+                if user_id not in resolved:
+                    resolved[user_id] = DirectoryEntry.unknown(user_id)
+        return resolved
@@ -1,87 +1,136 @@
 from __future__ import annotations
 
-import aiomysql
+import asyncio
+
 import disnake
 from disnake.ext import commands
 
+from .access import Database
+from .buffer import RewardBuffer
+from .cache import TTLCache
+from .rank_index import RankIndex
+
+
+class LeaderboardPages:
+    __slots__ = ("pages", "exhausted", "lock")
+
+    def __init__(self) -> None:
+        self.pages: list[list[tuple[int, int]]] = []
+        self.exhausted = False
+        self.lock = asyncio.Lock()
+
 
 class GuessThePokemonDatabase:
     bot: commands.Bot
-    database_pool: aiomysql.Pool
-
-    async def exec_write_operation(self, sql: str, values: tuple = None) -> None:
-
-        async with self.database_pool.acquire() as conn:
-            conn: aiomysql.Connection
-            async with conn.cursor() as cursor:
-                cursor: aiomysql.Cursor
-                await cursor.execute(sql, values)
-            await conn.commit()
-
-    async def exec_fetchall(self, sql: str, values: tuple = None) -> list[tuple]:
-        async with self.database_pool.acquire() as conn:
-            conn: aiomysql.Connection
-            async with conn.cursor() as cursor:
-                cursor: aiomysql.Cursor
-                await cursor.execute(sql, values)
-                return await cursor.fetchall()
-
-    async def exec_fetchone(self, sql: str, values: tuple = None) -> tuple:
-        async with self.database_pool.acquire() as conn:
-            conn: aiomysql.Connection
-            async with conn.cursor() as cursor:
-                cursor: aiomysql.Cursor
-                await cursor.execute(sql, values)
-                return await cursor.fetchone()
-
-    async def setup(self, bot: commands.Bot) -> None:
-
-        self.database_pool = bot.database_pool
+    db: Database
+    buffer: RewardBuffer | None = None
+    rank_index: RankIndex
+    local_pages: TTLCache[tuple[int, int], LeaderboardPages]
+    # committed guesses counted while the index is (re)built, applied after
+    _mirrored: list[tuple[int, int]] | None = None
+
+    async def setup(
+        self, bot: commands.Bot, buffer: RewardBuffer | None = None
+    ) -> None:
+        # the table itself is owned by database.migrations
+        self.db = bot.db
         self.bot = bot
+        self.buffer = buffer
+        self.local_pages = TTLCache(maxsize=512, ttl=30)
+        self._rebuild_lock = asyncio.Lock()
+        if buffer is not None:
+            buffer.listeners.append(self.publish_flushed)
+        await self.build_rank_index()
 
-        await self.exec_write_operation(
-            """
-            CREATE TABLE IF NOT EXISTS guesses
-            ( user_id BIGINT, guild_id BIGINT, guesses INT ) ;
-            """
-        )
+    async def build_rank_index(self) -> None:
+        # the only full aggregation, every later change is applied in place
+        async with self._rebuild_lock:
+            await self._build_rank_index()
 
-    async def local_leaderboard(self, guild: disnake.Guild) -> list[tuple]:
-        cursor = await self.connection.cursor()
-        await cursor.execute(
-            """
-            SELECT user_id, guesses FROM guesses
-            ORDER BY guesses DESC
-            WHERE guild_id = %s
-            """,
-            (guild.id,),
-        )
-        raw = await cursor.fetchall()
-        users = [
-            (self.bot.get_user(id_), guesses)
-            for id_, guesses in raw
-            if self.bot.get_user(id_)
-        ]
-        return users
-
-    async def global_leaderboard(self) -> list[tuple]:
-        raw = await self.exec_fetchall(
-            """
-            SELECT user_id, SUM(guesses) FROM guesses
-            GROUP BY user_id
-            ORDER BY SUM(guesses) DESC
-            """
-        )
-        # list(raw).sort(key= lambda t: t[1])
-        users = [
-            (self.bot.get_user(data[0]), data[1])
-            for data in raw
-            if self.bot.get_user(data[0] or await self.bot.fetch_user(data[0]))
-        ]
-        return users
+    async def _build_rank_index(self) -> None:
+        if self._mirrored is None:
+            self._mirrored = []
+        try:
+            while True:
+                flushes = self.buffer.flushes if self.buffer is not None else 0
+                raw = await self.db.fetchall(
+                    "SELECT user_id, SUM(guesses) FROM guesses GROUP BY user_id"
+                )
+                if self.buffer is None or self.buffer.flushes == flushes:
+                    break
+        finally:
+            mirrored, self._mirrored = self._mirrored, None
+        scores = {user_id: int(guesses) for user_id, guesses in raw}
+        if self.buffer is not None:
+            # guesses still waiting in the buffer are not in the table yet
+            for table in (self.buffer.guesses, self.buffer.inflight_guesses):
+                for (user_id, _), guesses in table.items():
+                    scores[user_id] = scores.get(user_id, 0) + guesses
+        rank_index = RankIndex()
+        rank_index.load(list(scores.items()))
+        # only committed guesses are published, a few that committed just
+        # before the query started may be counted twice until the next rebuild
+        for user_id, guesses in mirrored:
+            rank_index.add(user_id, guesses)
+        self.rank_index = rank_index
+
+    async def local_leaderboard(
+        self, guild_id: int, page: int = 0, per_page: int = 10
+    ) -> list[tuple[int, int]]:
+        # pages are fetched in order by keyset and kept for a short while, so
+        # flipping through a big server never rescans the guild's rows
+        key = (guild_id, per_page)
+        pages = self.local_pages.get(key)
+        if pages is None:
+            pages = LeaderboardPages()
+            self.local_pages.set(key, pages)
+        async with pages.lock:
+            while len(pages.pages) <= page and not pages.exhausted:
+                after = pages.pages[-1][-1] if pages.pages else None
+                rows = await self.fetch_local_page(guild_id, after, per_page)
+                if rows:
+                    pages.pages.append(rows)
+                if len(rows) < per_page:
+                    pages.exhausted = True
+        return pages.pages[page] if page < len(pages.pages) else []
+
+    async def fetch_local_page(
+        self, guild_id: int, after: tuple[int, int] | None, limit: int
+    ) -> list[tuple[int, int]]:
+        if after is None:
+            raw = await self.db.fetchall(
+                """
+                SELECT user_id, guesses FROM guesses
+                WHERE guild_id = %s
+                ORDER BY guesses DESC, user_id
+                LIMIT %s
+                """,
+                (guild_id, limit),
+            )
+        else:
+            user_id, guesses = after
+            raw = await self.db.fetchall(
+                """
+                SELECT user_id, guesses FROM guesses
+                WHERE guild_id = %s
+                AND ( guesses < %s OR ( guesses = %s AND user_id > %s ) )
+                ORDER BY guesses DESC, user_id
+                LIMIT %s
+                """,
+                (guild_id, guesses, guesses, user_id, limit),
+            )
+        return [(user_id, guesses) for user_id, guesses in raw]
+
+    async def global_leaderboard(self, limit: int = 10) -> list[tuple]:
+        top = self.rank_index.top(limit)
+        users = await self.bot.user_directory.resolve(user_id for user_id, _ in top)
+        return [(users[user_id], guesses) for user_id, guesses in top]
+
+    def global_rank(self, user_id: int) -> int | None:
+        return self.rank_index.rank(user_id)
 
     async def get_data_for_member(self, member: disnake.Member):
-        data = await self.exec_fetchall(
+        data = await self.db.fetchall(
             """
             SELECT * FROM guesses
             WHERE user_id = %s AND guild_id = %s
@@ -90,31 +139,65 @@ class GuessThePokemonDatabase:
         )
         return data
 
+    async def get_guesses_for_member(self, member: disnake.Member) -> int:
+        entry = await self.bot.stats_db.get(member.id)
+        return entry.guilds.get(member.guild.id, 0)
+
     async def get_guesses_for_user(self, user: disnake.User):
-        data = await self.exec_fetchone(
-            "SELECT SUM(guesses) FROM guesses WHERE user_id = %s", (user.id,)
-        )
-        return data[0] if data else 0
+        return (await self.bot.stats_db.get(user.id)).guesses
+
+    def join_cluster(self, cluster) -> None:
+        # every process keeps its own rank index, so committed guesses are
+        # mirrored; joined before setup so none slip past the first build
+        if not hasattr(self, "rank_index"):
+            self._mirrored = []
+        cluster.subscribe("guess", self.mirror_guess)
+        # guesses published while the link was down never arrive, start over
+        cluster.subscribe("reconnect", self.resync)
+
+    def resync(self, data: dict):
+        # before setup has built the index, that first build is still to come
+        if hasattr(self, "rank_index"):
+            return self.build_rank_index()
+        return None
+
+    def mirror_guess(self, data: dict) -> None:
+        for user_id, guesses in data["guesses"]:
+            self.count_guesses(user_id, guesses)
+
+    def count_guesses(self, user_id: int, guesses: int) -> None:
+        if self._mirrored is not None:
+            # applied to the new index once its query is back
+            self._mirrored.append((user_id, guesses))
+        else:
+            self.rank_index.add(user_id, guesses)
+
+    def publish_flushed(
+        self, coins: dict[int, int], guesses: dict[tuple[int, int], int]
+    ) -> None:
+        # buffered guesses reach the other processes once they are committed
+        if self.bot.cluster is None or not guesses:
+            return
+        totals: dict[int, int] = {}
+        for (user_id, _), count in guesses.items():
+            totals[user_id] = totals.get(user_id, 0) + count
+        self.bot.cluster.publish("guess", {"guesses": list(totals.items())})
 
     async def add_guess(self, member: disnake.Member):
-        values = (
-            member.id,
-            member.guild.id,
+        if self.buffer is not None:
+            # pending guesses are added back by every rebuild
+            self.rank_index.add(member.id)
+            self.buffer.add_guess(member.id, member.guild.id)
+            return self.bot.stats_db.guess_added(member.id, member.guild.id)
+        await self.db.execute(
+            """
+            INSERT INTO guesses ( user_id, guild_id, guesses )
+            VALUES ( %s, %s, 1 )
+            ON DUPLICATE KEY UPDATE guesses = guesses + 1
+            """,
+            (member.id, member.guild.id),
         )
-        if await self.get_data_for_member(member):
-            await self.exec_write_operation(
-                """
-                UPDATE guesses
-                SET guesses = guesses + 1
-                WHERE user_id = %s AND guild_id = %s
-                """,
-                values,
-            )
-        else:
-            await self.exec_write_operation(
-                """
-                INSERT INTO guesses
-                VALUES ( %s, %s, 1 )
-                """,
-                values,
-            )
+        self.count_guesses(member.id, 1)
+        if self.bot.cluster is not None:
+            self.bot.cluster.publish("guess", {"guesses": [(member.id, 1)]})
+        self.bot.stats_db.guess_added(member.id, member.guild.id)
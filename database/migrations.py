@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import aiomysql
+
+from .access import Database
+
+# Each migration is (version, description, statements). Versions are applied
+# in order and recorded in ``schema_version``; never edit a released entry,
+# append a new one instead. MySQL commits implicitly around DDL, so every
+# statement has to be safe to re-run if a migration dies halfway through.
+MIGRATIONS: list[tuple[int, str, tuple[str, ...]]] = [
+    (
+        1,
+        "primary keys on guesses and currency, duplicate rows merged",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS guesses
+            ( user_id BIGINT, guild_id BIGINT, guesses INT )
+            """,
+            "DROP TABLE IF EXISTS guesses_keyed",
+            """
+            CREATE TABLE guesses_keyed
+            (
+                user_id BIGINT NOT NULL,
+                guild_id BIGINT NOT NULL,
+                guesses INT NOT NULL DEFAULT 0,
+                PRIMARY KEY (user_id, guild_id)
+            )
+            """,
+            """
+            INSERT INTO guesses_keyed ( user_id, guild_id, guesses )
+            SELECT user_id, guild_id, SUM(guesses) FROM guesses
+            WHERE user_id IS NOT NULL AND guild_id IS NOT NULL
+            GROUP BY user_id, guild_id
+            """,
+            "DROP TABLE IF EXISTS guesses_unkeyed",
+            "RENAME TABLE guesses TO guesses_unkeyed, guesses_keyed TO guesses",
+            "DROP TABLE guesses_unkeyed",
+            """
+            CREATE TABLE IF NOT EXISTS currency
+            ( user_id BIGINT, coins INT )
+            """,
+            "DROP TABLE IF EXISTS currency_keyed",
+            """
+            CREATE TABLE currency_keyed
+            (
+                user_id BIGINT NOT NULL,
+                coins INT NOT NULL DEFAULT 0,
+                PRIMARY KEY (user_id)
+            )
+            """,
+            """
+            INSERT INTO currency_keyed ( user_id, coins )
+            SELECT user_id, SUM(coins) FROM currency
+            WHERE user_id IS NOT NULL
+            GROUP BY user_id
+            """,
+            "DROP TABLE IF EXISTS currency_unkeyed",
+            "RENAME TABLE currency TO currency_unkeyed, currency_keyed TO currency",
+            "DROP TABLE currency_unkeyed",
+        ),
+    ),
+    (
+        2,
+        "index guesses for per-guild leaderboard pages",
+        (
+            """
+            CREATE INDEX guesses_guild_rank
+            ON guesses ( guild_id, guesses DESC, user_id )
+            """,
+        ),
+    ),
+    (
+        3,
+        "users directory for leaderboard names and avatars",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS users
+            (
+                user_id BIGINT NOT NULL PRIMARY KEY,
+                name VARCHAR(64) NOT NULL,
+                avatar VARCHAR(64) NULL,
+                updated_at TIMESTAMP NOT NULL
+                    DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+            )
+            """,
+        ),
+    ),
+]
+
+# The same schema for the embedded SQLite backend, version for version.
+# SQLite runs DDL inside transactions, so each migration commits atomically.
+SQLITE_MIGRATIONS: list[tuple[int, str, tuple[str, ...]]] = [
+    (
+        1,
+        "primary keys on guesses and currency, duplicate rows merged",
+        (
+            """
+            CREATE TABLE guesses
+            (
+                user_id BIGINT NOT NULL,
+                guild_id BIGINT NOT NULL,
+                guesses INT NOT NULL DEFAULT 0,
+                PRIMARY KEY (user_id, guild_id)
+            ) WITHOUT ROWID
+            """,
+            """
+            CREATE TABLE currency
+            (
+                user_id BIGINT NOT NULL PRIMARY KEY,
+                coins INT NOT NULL DEFAULT 0
+            )
+            """,
+        ),
+    ),
+    (
+        2,
+        "index guesses for per-guild leaderboard pages",
+        (
+            """
+            CREATE INDEX guesses_guild_rank
+            ON guesses ( guild_id, guesses DESC, user_id )
+            """,
+        ),
+    ),
+    (
+        3,
+        "users directory for leaderboard names and avatars",
+        (
+            """
+            CREATE TABLE users
+            (
+                user_id BIGINT NOT NULL PRIMARY KEY,
+                name VARCHAR(64) NOT NULL,
+                avatar VARCHAR(64) NULL,
+                updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+        ),
+    ),
+]
+
+LOCK_NAME = "pokemare_schema_migrations"
+
+
+async def current_version(cursor: aiomysql.Cursor) -> int:
+    await cursor.execute("SELECT MAX(version) FROM schema_version")
+    row = await cursor.fetchone()
+    return (row[0] or 0) if row else 0
+
+
+async def run_sqlite_migrations(db: Database) -> int:
+    async with db.transaction() as tr:
+        # BEGIN IMMEDIATE takes the write lock, so only one process migrates
+        await tr.execute("BEGIN IMMEDIATE")
+        await tr.execute(
+            """
+            CREATE TABLE IF NOT EXISTS schema_version
+            (
+                version INT NOT NULL PRIMARY KEY,
+                description VARCHAR(255) NOT NULL,
+                applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        row = await tr.fetchone("SELECT MAX(version) FROM schema_version")
+        version = (row[0] or 0) if row else 0
+        for target, description, statements in SQLITE_MIGRATIONS:
+            if target <= version:
+                continue
+            for statement in statements:
+                await tr.execute(statement)
+            await tr.execute(
+                "INSERT INTO schema_version ( version, description ) VALUES ( %s, %s )",
+                (target, description),
+            )
+            print(f"Applied schema migration {target}: {description}")
+            version = target
+    return version
+
+
+async def run_migrations(db: Database, lock_timeout: int = 60) -> int:
+    if db.dialect == "sqlite":
+        return await run_sqlite_migrations(db)
+    async with db.acquire() as (conn, _):
+        conn: aiomysql.Connection
+        async with conn.cursor() as cursor:
+            cursor: aiomysql.Cursor
+            # several bot processes may boot at once, only one gets to migrate
+            await cursor.execute("SELECT GET_LOCK(%s, %s)", (LOCK_NAME, lock_timeout))
+            (locked,) = await cursor.fetchone()
+            if not locked:
+                raise RuntimeError("Timed out waiting for the schema migration lock.")
+            try:
+                await cursor.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS schema_version
+                    (
+                        version INT NOT NULL PRIMARY KEY,
+                        description VARCHAR(255) NOT NULL,
+                        applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+                    )
+                    """
+                )
+                await conn.commit()
+                version = await current_version(cursor)
+                for target, description, statements in MIGRATIONS:
+                    if target <= version:
+                        continue
+                    for statement in statements:
+                        await cursor.execute(statement)
+                    await cursor.execute(
+                        "INSERT INTO schema_version ( version, description ) VALUES ( %s, %s )",
+                        (target, description),
+                    )
+                    await conn.commit()
+                    print(f"Applied schema migration {target}: {description}")
+                    version = target
+                return version
+            finally:
+                await cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+                await conn.commit()
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import math
+import random
+from typing import Iterator
+
+_MAX_LEVELS = 32
+
+
+class _Node:
+    __slots__ = ("key", "next", "width")
+
+    def __init__(self, key: tuple, levels: int) -> None:
+        self.key = key
+        self.next: list[_Node] = [None] * levels
+        self.width: list[int] = [1] * levels
+
+
+class IndexableSkiplist:
+    """Sorted container with O(log n) insert, remove, rank and index access.
+
+    Every forward link also stores how many elements it skips, so the
+    position of a key falls out of the same walk that finds it.
+    """
+
+    def __init__(self) -> None:
+        self.size = 0
+        # highest level any node reaches, links above it all point at the tail
+        self._levels = 1
+        self._tail = _Node((math.inf,), 0)
+        self._head = _Node(None, _MAX_LEVELS)
+        self._head.next = [self._tail] * _MAX_LEVELS
+
+    @classmethod
+    def from_sorted(cls, keys: list[tuple]) -> IndexableSkiplist:
+        # links the nodes in one pass instead of n separate searches
+        self = cls()
+        last = [self._head] * _MAX_LEVELS
+        last_position = [0] * _MAX_LEVELS
+        for position, key in enumerate(keys, start=1):
+            levels = min(_MAX_LEVELS, 1 - int(math.log2(1.0 - random.random())))
+            node = _Node(key, levels)
+            for level in range(levels):
+                last[level].next[level] = node
+                last[level].width[level] = position - last_position[level]
+                last[level] = node
+                last_position[level] = position
+            self._levels = max(self._levels, levels)
+        self.size = len(keys)
+        for level in range(self._levels):
+            last[level].next[level] = self._tail
+            last[level].width[level] = self.size + 1 - last_position[level]
+        return self
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self) -> Iterator[tuple]:
+        return self.iter_from(0)
+
+    def __getitem__(self, index: int) -> tuple:
+        if not 0 <= index < self.size:
+            raise IndexError(index)
+        return self._node_at(index).key
+
+    def _node_at(self, index: int) -> _Node:
+        node = self._head
+        index += 1
+        for level in reversed(range(self._levels)):
+            while node.next[level] is not self._tail and node.width[level] <= index:
+                index -= node.width[level]
+                node = node.next[level]
+        return node
+
+    def iter_from(self, index: int) -> Iterator[tuple]:
+        if index >= self.size:
+            return
+        node = self._node_at(max(index, 0))
+        while node is not self._tail:
+            yield node.key
+            node = node.next[0]
+
+    def rank(self, key: tuple) -> int:
+        """Number of stored keys strictly smaller than ``key``."""
+        position = 0
+        node = self._head
+        for level in reversed(range(self._levels)):
+            while node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+        return position
+
+    def insert(self, key: tuple) -> None:
+        levels = min(_MAX_LEVELS, 1 - int(math.log2(1.0 - random.random())))
+        for level in range(self._levels, levels):
+            self._head.width[level] = self.size + 1
+        self._levels = max(self._levels, levels)
+
+        chain = [self._head] * self._levels
+        steps_at_level = [0] * self._levels
+        node = self._head
+        for level in reversed(range(self._levels)):
+            while node.next[level].key <= key:
+                steps_at_level[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+
+        new = _Node(key, levels)
+        steps = 0
+        for level in range(levels):
+            prev = chain[level]
+            new.next[level] = prev.next[level]
+            prev.next[level] = new
+            new.width[level] = prev.width[level] - steps
+            prev.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(levels, self._levels):
+            chain[level].width[level] += 1
+        self.size += 1
+
+    def remove(self, key: tuple) -> None:
+        chain = [self._head] * self._levels
+        node = self._head
+        for level in reversed(range(self._levels)):
+            while node.next[level].key < key:
+                node = node.next[level]
+            chain[level] = node
+        target = chain[0].next[0]
+        if target.key != key:
+            raise KeyError(key)
+
+        for level in range(len(target.next)):
+            prev = chain[level]
+            prev.width[level] += target.width[level] - 1
+            prev.next[level] = target.next[level]
+        for level in range(len(target.next), self._levels):
+            chain[level].width[level] -= 1
+        self.size -= 1
+
+
+class RankIndex:
+    """Per-user totals kept in leaderboard order.
+
+    Keys are ``(-score, user_id)`` so the skiplist's ascending order is the
+    leaderboard order, and ties are broken by user id to keep keys unique.
+    """
+
+    def __init__(self) -> None:
+        self.scores: dict[int, int] = {}
+        self._order = IndexableSkiplist()
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self.scores
+
+    def clear(self) -> None:
+        self.scores.clear()
+        self._order = IndexableSkiplist()
+
+    def load(self, rows: list[tuple[int, int]]) -> None:
+        self.scores = {user_id: score for user_id, score in rows}
+        self._order = IndexableSkiplist.from_sorted(
+            sorted((-score, user_id) for user_id, score in self.scores.items())
+        )
+
+    def set(self, user_id: int, score: int) -> None:
+        old = self.scores.get(user_id)
+        if old == score:
+            return
+        if old is not None:
+            self._order.remove((-old, user_id))
+        self.scores[user_id] = score
+        self._order.insert((-score, user_id))
+
+    def add(self, user_id: int, delta: int = 1) -> int:
+        score = self.scores.get(user_id, 0) + delta
+        self.set(user_id, score)
+        return score
+
+    def score(self, user_id: int) -> int:
+        return self.scores.get(user_id, 0)
+
+    def rank(self, user_id: int) -> int | None:
+        # competition ranking: users on the same score share a position
+        score = self.scores.get(user_id)
+        if score is None:
+            return None
+        return self._order.rank((-score,)) + 1
+
+    def top(self, limit: int = 10, offset: int = 0) -> list[tuple[int, int]]:
+        entries = []
+        for negative_score, user_id in self._order.iter_from(offset):
+            if len(entries) >= limit:
+                break
+            entries.append((user_id, -negative_score))
+        return entries
+
+    def iter_ranked(self, offset: int = 0) -> Iterator[tuple[int, int]]:
+        for negative_score, user_id in self._order.iter_from(offset):
+            yield user_id, -negative_score
@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import contextlib
+import os
+import re
+import sqlite3
+import time
+from typing import Any, AsyncIterator, Sequence
+
+from .access import Database, Transaction
+
+_VALUES = re.compile(r"VALUES\((\w+)\)")
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    # durable at checkpoints; a power loss can drop the last few commits
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16384",
+    "PRAGMA mmap_size = 268435456",
+)
+
+
+def translate(sql: str) -> str:
+    """Rewrite the MySQL spellings the repositories use into SQLite's."""
+    sql = _VALUES.sub(r"excluded.\1", sql.replace("%s", "?"))
+    return sql.replace("ON DUPLICATE KEY UPDATE", "ON CONFLICT DO UPDATE SET")
+
+
+class SQLiteCursor:
+    """The slice of ``aiomysql.Cursor`` that :class:`Transaction` uses.
+
+    Statements run on the connection's own thread and results are fetched
+    in the same hop, so a query costs one thread round trip.
+    """
+
+    def __init__(self, connection: SQLiteConnection) -> None:
+        self.connection = connection
+        self.rowcount = -1
+        self._rows: list[tuple] = []
+
+    async def __aenter__(self) -> SQLiteCursor:
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self._rows = []
+
+    async def execute(self, sql: str, values: Sequence | None = None) -> None:
+        self.rowcount, self._rows = await self.connection.run(
+            _execute, self.connection.prepare(sql), values or ()
+        )
+
+    async def executemany(self, sql: str, values: Sequence[Sequence]) -> None:
+        self.rowcount, self._rows = await self.connection.run(
+            _executemany, self.connection.prepare(sql), values
+        )
+
+    async def fetchall(self) -> list[tuple]:
+        return self._rows
+
+    async def fetchone(self) -> tuple | None:
+        return self._rows[0] if self._rows else None
+
+
+def _execute(conn: sqlite3.Connection, sql: str, values: Sequence) -> tuple[int, list]:
+    cursor = conn.execute(sql, values)
+    rows = cursor.fetchall() if cursor.description else []
+    return cursor.rowcount, rows
+
+
+def _executemany(
+    conn: sqlite3.Connection, sql: str, values: Sequence
+) -> tuple[int, list]:
+    return conn.executemany(sql, values).rowcount, []
+
+
+class SQLiteConnection:
+    """One sqlite3 connection pinned to a dedicated thread."""
+
+    def __init__(self, path: str, readonly: bool, statements: dict[str, str]) -> None:
+        self._thread = concurrent.futures.ThreadPoolExecutor(1, "sqlite")
+        self._statements = statements
+        self.conn: sqlite3.Connection = self._thread.submit(
+            self._connect, path, readonly
+        ).result()
+
+    @staticmethod
+    def _connect(path: str, readonly: bool) -> sqlite3.Connection:
+        # sqlite3 keeps compiled statements per connection, keyed by SQL text
+        conn = sqlite3.connect(path, cached_statements=256, check_same_thread=False)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        if readonly:
+            conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    def prepare(self, sql: str) -> str:
+        translated = self._statements.get(sql)
+        if translated is None:
+            translated = self._statements[sql] = translate(sql)
+        return translated
+
+    async def run(self, function, *args) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(
+            self._thread, function, self.conn, *args
+        )
+
+    def cursor(self) -> SQLiteCursor:
+        return SQLiteCursor(self)
+
+    async def commit(self) -> None:
+        await self.run(sqlite3.Connection.commit)
+
+    async def rollback(self) -> None:
+        await self.run(sqlite3.Connection.rollback)
+
+    def close(self) -> None:
+        self._thread.submit(self.conn.close).result()
+        self._thread.shutdown()
+
+
+class SQLitePool:
+    """A single writer connection and a pool of query-only readers.
+
+    WAL lets the readers run beside the writer, while every write in the
+    process queues for the one writer instead of fighting over the lock.
+    """
+
+    def __init__(
+        self, writer: SQLiteConnection, readers: list[SQLiteConnection]
+    ) -> None:
+        self.writer = writer
+        self.readers = readers
+        self._writer: asyncio.Queue[SQLiteConnection] = asyncio.Queue()
+        self._writer.put_nowait(self.writer)
+        self._readers: asyncio.Queue[SQLiteConnection] = asyncio.Queue()
+        for reader in self.readers:
+            self._readers.put_nowait(reader)
+
+    @staticmethod
+    def connect(
+        path: str, readers: int = 4
+    ) -> tuple[SQLiteConnection, list[SQLiteConnection]]:
+        """Opens the connections; blocking, so it is run off the event loop."""
+        statements: dict[str, str] = {}
+        writer = SQLiteConnection(path, False, statements)
+        return writer, [
+            SQLiteConnection(path, True, statements) for _ in range(readers)
+        ]
+
+    @property
+    def size(self) -> int:
+        return 1 + len(self.readers)
+
+    @property
+    def freesize(self) -> int:
+        return self._writer.qsize() + self._readers.qsize()
+
+    async def acquire(self) -> SQLiteConnection:
+        return await self._writer.get()
+
+    async def acquire_reader(self) -> SQLiteConnection:
+        return await self._readers.get()
+
+    def release(self, conn: SQLiteConnection) -> None:
+        (self._writer if conn is self.writer else self._readers).put_nowait(conn)
+
+    def close(self) -> None:
+        for conn in (self.writer, *self.readers):
+            conn.close()
+
+    async def wait_closed(self) -> None:
+        pass
+
+
+class SQLiteDatabase(Database):
+    """:class:`Database` on an embedded SQLite file in WAL mode.
+
+    ``execute``, ``executemany`` and :meth:`transaction` go through the
+    writer, ``fetchall`` and ``fetchone`` through the readers. Statements
+    keep their MySQL spelling and are translated once per distinct text.
+    """
+
+    dialect = "sqlite"
+    pool: SQLitePool
+
+    @classmethod
+    async def create(
+        cls, path: str, readers: int = 4, acquire_timeout: float = 10.0
+    ) -> SQLiteDatabase:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # the queues belong on the loop thread, only the connecting is moved
+        writer, connections = await asyncio.to_thread(SQLitePool.connect, path, readers)
+        pool = SQLitePool(writer, connections)
+        return cls(pool, acquire_timeout=acquire_timeout)
+
+    @classmethod
+    async def from_env(cls) -> SQLiteDatabase:
+        return await cls.create(
+            os.getenv("SQLITE_PATH", "data/pokemare.sqlite3"),
+            readers=int(os.getenv("SQLITE_READERS", 4)),
+            acquire_timeout=float(os.getenv("DB_ACQUIRE_TIMEOUT", 10)),
+        )
+
+    async def close(self) -> None:
+        await asyncio.to_thread(self.pool.close)
+
+    @contextlib.asynccontextmanager
+    async def reading(self) -> AsyncIterator[Transaction]:
+        started = time.perf_counter()
+        conn = await asyncio.wait_for(
+            self.pool.acquire_reader(), timeout=self.acquire_timeout
+        )
+        try:
+            yield Transaction(self, conn, time.perf_counter() - started)
+        finally:
+            self.pool.release(conn)
+
+    async def fetchall(self, sql: str, values: Sequence | None = None) -> list[tuple]:
+        async with self.reading() as tr:
+            return await tr.fetchall(sql, values)
+
+    async def fetchone(self, sql: str, values: Sequence | None = None) -> tuple | None:
+        async with self.reading() as tr:
+            return await tr.fetchone(sql, values)
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import asyncio
+
+from disnake.ext import commands
+
+from .access import Database
+from .buffer import RewardBuffer
+from .cache import TTLCache
+
+
+class StatsEntry:
+    __slots__ = ("coins", "guilds")
+
+    def __init__(self, coins: int, guilds: dict[int, int]) -> None:
+        self.coins = coins
+        self.guilds = guilds
+
+    @property
+    def guesses(self) -> int:
+        return sum(self.guilds.values())
+
+
+class UserStats:
+    """Read-through cache of each user's coins and per-guild guesses.
+
+    An entry is loaded with one query. The writing repositories report
+    every change through :meth:`coins_added` and :meth:`guess_added`:
+    buffered rewards update the entry in place, direct writes drop it.
+    Buffered rewards are folded in when an entry is loaded, so hits never
+    consult the write-behind buffer.
+    """
+
+    bot: commands.Bot
+    db: Database
+    buffer: RewardBuffer | None = None
+    cache: TTLCache[int, StatsEntry]
+
+    async def setup(
+        self, bot: commands.Bot, buffer: RewardBuffer | None = None
+    ) -> None:
+        self.db = bot.db
+        self.bot = bot
+        self.buffer = buffer
+        self.cache = TTLCache(maxsize=10_000, ttl=300)
+        # concurrent misses for one user share a single load
+        self._loads: dict[int, asyncio.Future] = {}
+        # users written while their entry is loading; that load is not cached
+        self._loading: dict[int, bool] = {}
+
+    def join_cluster(self, cluster) -> None:
+        # other processes write rewards too; drop what they touched
+        cluster.subscribe("stats", lambda data: self.cache.pop(data["user_id"]))
+
+    async def load(self, user_id: int) -> StatsEntry:
+        # coins and every guild's guesses in a single round trip
+        self._loading[user_id] = False
+        try:
+            while True:
+                flushes = self.buffer.flushes if self.buffer is not None else 0
+                rows = await self.db.fetchall(
+                    """
+                    SELECT NULL, coins FROM currency WHERE user_id = %s
+                    UNION ALL
+                    SELECT guild_id, guesses FROM guesses WHERE user_id = %s
+                    """,
+                    (user_id, user_id),
+                )
+                # a flush committed mid-query moved rewards out of the buffer
+                # that the rows may not include yet, so read again
+                if self.buffer is None or self.buffer.flushes == flushes:
+                    break
+        finally:
+            stale = self._loading.pop(user_id)
+        entry = StatsEntry(0, {})
+        for guild_id, value in rows:
+            if guild_id is None:
+                entry.coins = int(value or 0)
+            else:
+                entry.guilds[guild_id] = int(value or 0)
+        if self.buffer is not None:
+            entry.coins += self.buffer.pending_coins(user_id)
+            for guild_id, count in self.buffer.pending_guild_guesses(user_id).items():
+                entry.guilds[guild_id] = entry.guilds.get(guild_id, 0) + count
+        if not stale:
+            self.cache.set(user_id, entry)
+        return entry
+
+    async def get(self, user_id: int) -> StatsEntry:
+        entry = self.cache.get(user_id)
+        if entry is not None:
+            return entry
+        if user_id in self._loads:
+            return await asyncio.shield(self._loads[user_id])
+        future = self._loads[user_id] = asyncio.get_running_loop().create_future()
+        try:
+            entry = await self.load(user_id)
+            future.set_result(entry)
+            return entry
+        except BaseException as error:
+            future.set_exception(error)
+            future.exception()  # mark retrieved when nobody else is waiting
+            raise
+        finally:
+            del self._loads[user_id]
+
+    async def get_stats_for(self, user_id: int) -> tuple[int, int]:
+        entry = await self.get(user_id)
+        return entry.coins, entry.guesses
+
+    def _apply(self, user_id: int) -> StatsEntry | None:
+        if user_id in self._loading:
+            self._loading[user_id] = True
+        cluster = getattr(self.bot, "cluster", None)
+        if cluster is not None:
+            cluster.publish("stats", {"user_id": user_id})
+        if self.buffer is None:
+            # a load overlapping the committed write may or may not have
+            # seen it, so adding on top could count it twice
+            self.cache.pop(user_id)
+            return None
+        # buffered writes land in memory in the same step as this call
+        return self.cache.peek(user_id)
+
+    def coins_added(self, user_id: int, coins: int) -> None:
+        entry = self._apply(user_id)
+        if entry is not None:
+            entry.coins += coins
+
+    def guess_added(self, user_id: int, guild_id: int, guesses: int = 1) -> None:
+        entry = self._apply(user_id)
+        if entry is not None:
+            entry.guilds[guild_id] = entry.guilds.get(guild_id, 0) + guesses
@@ -1,76 +1,38 @@
 from __future__ import annotations
 
-import aiomysql
 import disnake
 from disnake.ext import commands
 
+from .access import Database
+from .buffer import RewardBuffer
+
 
 class Currency:
     bot: commands.Bot
-    database_pool: aiomysql.Pool
-
-    async def exec_write_operation(self, sql: str, values: tuple = None) -> None:
-
-        async with self.database_pool.acquire() as conn:
-            conn: aiomysql.Connection
-            async with conn.cursor() as cursor:
-                cursor: aiomysql.Cursor
-                await cursor.execute(sql, values)
-            await conn.commit()
-
-    async def exec_fetchall(self, sql: str, values: tuple = None) -> list[tuple]:
-        async with self.database_pool.acquire() as conn:
-            conn: aiomysql.Connection
-            async with conn.cursor() as cursor:
-                cursor: aiomysql.Cursor
-                await cursor.execute(sql, values)
-                return await cursor.fetchall()
-
-    async def exec_fetchone(self, sql: str, values: tuple = None) -> tuple:
-        async with self.database_pool.acquire() as conn:
-            conn: aiomysql.Connection
-            async with conn.cursor() as cursor:
-                cursor: aiomysql.Cursor
-                await cursor.execute(sql, values)
-                return await cursor.fetchone()
-
-    async def setup(self, bot: commands.Bot) -> None:
-
-        self.database_pool = bot.database_pool
+    db: Database
+    buffer: RewardBuffer | None = None
+
+    async def setup(
+        self, bot: commands.Bot, buffer: RewardBuffer | None = None
+    ) -> None:
+        # the table itself is owned by database.migrations
+        self.db = bot.db
         self.bot = bot
-
-        await self.exec_write_operation(
-            """
-            CREATE TABLE IF NOT EXISTS currency
-            ( user_id BIGINT, coins INT )
-            """
-        )
+        self.buffer = buffer
 
     async def get_coins_for(self, user_id: int) -> int:
-        data = await self.exec_fetchone(
+        return (await self.bot.stats_db.get(user_id)).coins
+
+    async def add_coins_to(self, user_id: int, coins: int) -> None:
+        if self.buffer is not None:
+            self.buffer.add_coins(user_id, coins)
+            return self.bot.stats_db.coins_added(user_id, coins)
+        await self.db.execute(
             """
-            SELECT * FROM currency 
-            WHERE user_id = %s
+            INSERT INTO currency ( user_id, coins )
+            VALUES ( %s, %s )
+            ON DUPLICATE KEY UPDATE coins = coins + VALUES(coins)
             """,
-            (user_id,),
+            (user_id, coins),
         )
-        return data[1] if data else 0
-
-    async def add_coins_to(self, user_id: int, coins: int) -> None:
-        if not await self.get_coins_for(user_id):
-            await self.exec_write_operation(
-                """
-                INSERT INTO currency 
-                VALUES ( %s, %s )
-                """,
-                (user_id, coins),
-            )
-        else:
-            await self.exec_write_operation(
-                """
-                UPDATE currency
-                SET coins = coins + %s
-                WHERE user_id = %s
-                """,
-                (coins, user_id),
-            )
+        self.bot.stats_db.coins_added(user_id, coins)
@@ -1,4 +1,139 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import multiprocessing
+import os
+import secrets
+import signal
+import time
+
+import aiohttp
+import dotenv
+
 from core.bot import PokeMare
+from core.cluster import ClusterServer
+
+
+def install_uvloop() -> None:
+    try:
+        import uvloop
+    except ImportError:
+        pass
+    else:
+        uvloop.install()
+
+
+def run_cluster(cluster_id: int, shard_ids: list[int], shard_count: int) -> None:
+    install_uvloop()
+    print(f"Cluster {cluster_id}: starting shards {shard_ids[0]}-{shard_ids[-1]}")
+    PokeMare(shard_ids=shard_ids, shard_count=shard_count, cluster_id=cluster_id).run()
+
+
+async def gateway_info(token: str) -> tuple[int, int]:
+    async with aiohttp.ClientSession() as session:
+        async with session.get(
+            "https://discord.com/api/v10/gateway/bot",
+            headers={"Authorization": f"Bot {token}"},
+        ) as response:
+            response.raise_for_status()
+            data = await response.json()
+    return data["shards"], data["session_start_limit"]["max_concurrency"]
+
+
+class Supervisor:
+    """Runs one process per cluster and restarts any that exit."""
+
+    def __init__(self, clusters: int, shard_count: int, max_concurrency: int) -> None:
+        self.shard_count = shard_count
+        per_cluster = -(-shard_count // clusters)
+        self.shards = [
+            list(range(start, min(start + per_cluster, shard_count)))
+            for start in range(0, shard_count, per_cluster)
+        ]
+        # Discord allows max_concurrency IDENTIFYs every 5 seconds, bot-wide
+        self.stagger = 5 * per_cluster / max_concurrency
+        self.context = multiprocessing.get_context("spawn")
+        self.processes: dict[int, multiprocessing.Process] = {}
+        self.restarts: dict[int, list[float]] = {}
+        self.stopping = False
+
+    def spawn(self, cluster_id: int) -> None:
+        process = self.context.Process(
+            target=run_cluster,
+            args=(cluster_id, self.shards[cluster_id], self.shard_count),
+            name=f"pokemare-cluster-{cluster_id}",
+        )
+        process.start()
+        self.processes[cluster_id] = process
+
+    async def run(self) -> None:
+        for cluster_id in range(len(self.shards)):
+            self.spawn(cluster_id)
+            await asyncio.sleep(self.stagger)
+        while not self.stopping:
+            await asyncio.sleep(5)
+            for cluster_id, process in list(self.processes.items()):
+                if process.is_alive() or self.stopping:
+                    continue
+                recent = [
+                    at
+                    for at in self.restarts.get(cluster_id, [])
+                    if at > time.monotonic() - 300
+                ]
+                # back off a cluster that keeps crashing instead of spinning on it
+                delay = min(2 ** len(recent), 120)
+                print(
+                    f"Cluster {cluster_id} exited with {process.exitcode}, "
+                    f"restarting in {delay}s"
+                )
+                self.restarts[cluster_id] = recent + [time.monotonic()]
+                await asyncio.sleep(delay)
+                if not self.stopping:
+                    self.spawn(cluster_id)
+
+    def stop(self) -> None:
+        self.stopping = True
+        for process in self.processes.values():
+            if process.is_alive():
+                process.terminate()
+        for process in self.processes.values():
+            process.join(timeout=30)
+
+
+async def run_clusters(clusters: int) -> None:
+    token = os.getenv("TOKEN")
+    shard_count, max_concurrency = await gateway_info(token)
+    shard_count = int(os.getenv("SHARD_COUNT", shard_count))
+    # spawned workers inherit the environment, including the IPC secret
+    os.environ["CLUSTER_IPC_TOKEN"] = secrets.token_hex(16)
+    server = ClusterServer(
+        os.environ["CLUSTER_IPC_TOKEN"],
+        host=os.getenv("CLUSTER_IPC_HOST", "127.0.0.1"),
+        port=int(os.getenv("CLUSTER_IPC_PORT", 4840)),
+    )
+    await server.start()
+    supervisor = Supervisor(min(clusters, shard_count), shard_count, max_concurrency)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        with contextlib.suppress(NotImplementedError):
+            loop.add_signal_handler(sig, supervisor.stop)
+    print(
+        f"Launching {len(supervisor.shards)} clusters for {shard_count} shards "
+        f"on IPC port {server.port}"
+    )
+    try:
+        await supervisor.run()
+    finally:
+        supervisor.stop()
+        await server.close()
+
 
 if __name__ == "__main__":
-    PokeMare().run()
+    dotenv.load_dotenv()
+    clusters = int(os.getenv("CLUSTERS", 0))
+    if clusters > 0:
+        asyncio.run(run_clusters(clusters))
+    else:
+        install_uvloop()
+        PokeMare().run()
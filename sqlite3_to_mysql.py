@@ -1,36 +1,152 @@
-import sqlite3, os, aiomysql, asyncio
+"""Import the legacy SQLite ``guesses`` and ``currency`` tables.
 
+Rows are streamed by rowid in chunks, duplicates are merged per key and
+added onto whatever the configured database (``DB_BACKEND``) already holds
+with multi-row upserts. The last imported rowid of each table is saved in
+``import_checkpoints`` in the same transaction as the rows it covers, so
+an interrupted import resumes where it stopped without counting anything
+twice.
 
-db = sqlite3.connect("gtpdatabase.db")
-cursor = db.cursor()
-cursor.execute("SELECT * FROM guesses")
-data = cursor.fetchall()
-print(data)
+    python sqlite3_to_mysql.py gtpdatabase.db --chunk-size 5000
+"""
+from __future__ import annotations
 
+import argparse
+import asyncio
+import os
+import sqlite3
+import time
 
-async def main():
-    database: aiomysql.Connection = await aiomysql.connect(
-        host=os.getenv("MYSQLHOST"),
-        user=os.getenv("MYSQLUSER"),
-        db=os.getenv("MYSQLDATABASE"),
-        password=os.getenv("MYSQLPASSWORD"),
-        port=int(os.getenv("MYSQLPORT")),
-        loop=asyncio.get_event_loop(),
-        autocommit=False,
-    )
+import dotenv
+
+from database.access import Database
+from database.backends import database_from_env
+from database.migrations import run_migrations
 
-    cursor: aiomysql.Cursor = await database.cursor()
-    await cursor.execute(
+# table -> (key columns, summed column, MySQL upsert)
+TABLES = {
+    "guesses": (
+        ("user_id", "guild_id"),
+        "guesses",
         """
-        CREATE TABLE IF NOT EXISTS guesses
-        ( user_id BIGINT, guild_id BIGINT, guesses INT ) ;
+        INSERT INTO guesses ( user_id, guild_id, guesses )
+        VALUES ( %s, %s, %s )
+        ON DUPLICATE KEY UPDATE guesses = guesses + VALUES(guesses)
+        """,
+    ),
+    "currency": (
+        ("user_id",),
+        "coins",
         """
+        INSERT INTO currency ( user_id, coins )
+        VALUES ( %s, %s )
+        ON DUPLICATE KEY UPDATE coins = coins + VALUES(coins)
+        """,
+    ),
+}
+
+
+async def checkpoint(db: Database, source: str, table: str) -> tuple[int, int]:
+    row = await db.fetchone(
+        "SELECT last_rowid, rows_read FROM import_checkpoints WHERE source = %s AND table_name = %s",
+        (source, table),
+    )
+    return (row[0], row[1]) if row else (0, 0)
+
+
+def merge(rows: list[tuple], keys: int) -> list[tuple]:
+    merged: dict[tuple, int] = {}
+    for row in rows:
+        key, value = row[1 : keys + 1], row[keys + 1]
+        if None in key or not value:
+            continue
+        merged[key] = merged.get(key, 0) + value
+    return [(*key, value) for key, value in merged.items()]
+
+
+async def import_table(
+    db: Database, sqlite: sqlite3.Connection, source: str, table: str, chunk_size: int
+) -> None:
+    keys, value, upsert = TABLES[table]
+    last_rowid, rows_read = await checkpoint(db, source, table)
+    if last_rowid:
+        print(f"{table}: resuming after rowid {last_rowid} ({rows_read} rows done)")
+    cursor = sqlite.execute(
+        f"SELECT rowid, {', '.join(keys)}, {value} FROM {table} "
+        "WHERE rowid > ? ORDER BY rowid",
+        (last_rowid,),
     )
-    await database.commit()
-    for values in data:
-        await cursor.execute("INSERT INTO guesses VALUES ( %s, %s, %s)", values)
-    await database.commit()
-    database.close()
+    started = time.perf_counter()
+    read = written = 0
+    # the next chunk is read on a thread while the current one is written
+    chunk = await asyncio.to_thread(cursor.fetchmany, chunk_size)
+    while chunk:
+        following = asyncio.create_task(asyncio.to_thread(cursor.fetchmany, chunk_size))
+        rows = merge(chunk, len(keys))
+        last_rowid = chunk[-1][0]
+        read += len(chunk)
+        async with db.transaction() as tr:
+            if rows:
+                await tr.executemany(upsert, rows)
+            await tr.execute(
+                """
+                INSERT INTO import_checkpoints ( source, table_name, last_rowid, rows_read )
+                VALUES ( %s, %s, %s, %s )
+                ON DUPLICATE KEY UPDATE
+                    last_rowid = VALUES(last_rowid), rows_read = VALUES(rows_read)
+                """,
+                (source, table, last_rowid, rows_read + read),
+            )
+        written += len(rows)
+        elapsed = time.perf_counter() - started
+        print(
+            f"{table}: {rows_read + read} rows read, {written} upserted, "
+            f"{read / elapsed:,.0f} rows/s"
+        )
+        chunk = await following
+    print(f"{table}: done, {read} new rows in {time.perf_counter() - started:.1f}s")
 
 
-asyncio.run(main())
+async def main(arguments: argparse.Namespace) -> None:
+    dotenv.load_dotenv()
+    db = await database_from_env()
+    try:
+        await run_migrations(db)
+        await db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS import_checkpoints
+            (
+                source VARCHAR(255) NOT NULL,
+                table_name VARCHAR(64) NOT NULL,
+                last_rowid BIGINT NOT NULL,
+                rows_read BIGINT NOT NULL,
+                PRIMARY KEY (source, table_name)
+            )
+            """
+        )
+        sqlite = sqlite3.connect(arguments.path, check_same_thread=False)
+        source = os.path.abspath(arguments.path)
+        existing = {
+            name
+            for (name,) in sqlite.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'"
+            )
+        }
+        for table in arguments.tables:
+            if table not in existing:
+                print(f"{table}: not in {arguments.path}, skipped")
+                continue
+            await import_table(db, sqlite, source, table, arguments.chunk_size)
+        sqlite.close()
+    finally:
+        await db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", nargs="?", default="gtpdatabase.db")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument(
+        "--tables", nargs="+", choices=list(TABLES), default=list(TABLES)
+    )
+    asyncio.run(main(parser.parse_args()))